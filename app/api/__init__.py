@@ -1,7 +1,10 @@
 from .auth import router as auth_router
 from .root import router as root_router
+from .metrics import router as metrics_router
 from .users.views import router as users_router
 from .profiles.views import router as profile_router
+from .products.views import router as products_router
+from .orders.views import router as orders_router
 
 from fastapi import APIRouter
 
@@ -9,5 +12,8 @@ router = APIRouter( )
 
 router.include_router(auth_router)
 router.include_router(root_router)
+router.include_router(metrics_router)
 router.include_router(users_router)
 router.include_router(profile_router)
+router.include_router(products_router)
+router.include_router(orders_router)
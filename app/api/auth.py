@@ -2,12 +2,13 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, status, Body, HTTPException
 
 from .users.schemas import UserAuth
-from .token import Token
-from core.security import create_jwt_token
-from .dependencies import auth_user_oath2, oauth2_scheme
+from .token import Token, Principal, RefreshRequest, LogoutRequest
+from .tokens.crud import RefreshTokenCRUD, refresh_token_crud
+from core.security import create_access_token
+from core.revocation import revocation_store
+from .dependencies import auth_user_oath2, decode_token, get_current_user, token_cache
 
 router = APIRouter(tags=["Authentification"])
-blacklist = set()
 
 @router.post(
     "/login",
@@ -18,7 +19,11 @@ blacklist = set()
             "description": "User login",
             "content": {
                 "application/json": {
-                    "example": {"access_token": "token", "token_type": "bearer"}
+                    "example": {
+                        "access_token": "token",
+                        "token_type": "bearer",
+                        "refresh_token": "token",
+                    }
                 }
             },
         },
@@ -27,12 +32,59 @@ blacklist = set()
         },
     },
 )
-def login(
+async def login(
     user_in: Annotated[UserAuth, Depends(auth_user_oath2)],
+    crud: Annotated[RefreshTokenCRUD, Depends(refresh_token_crud)],
+) -> Token:
+    """
+    Функция авторизации пользователя.
+    В случае успеха возвращает токен доступа и refresh токен
+    """
+    token = create_access_token(user_in.id, user_in.username)
+    refresh_token = await crud.issue(user_in.id)
+    return Token(access_token=token, token_type="bearer", refresh_token=refresh_token)
+
+
+@router.post(
+    "/token/refresh",
+    status_code=status.HTTP_200_OK,
+    summary="Refresh access token",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "New access token",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "access_token": "token",
+                        "token_type": "bearer",
+                        "refresh_token": "token",
+                    }
+                }
+            },
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid refresh token",
+        },
+    },
+)
+async def refresh(
+    refresh_in: Annotated[RefreshRequest, Body()],
+    crud: Annotated[RefreshTokenCRUD, Depends(refresh_token_crud)],
 ) -> Token:
-    """Функция авторизации пользователя. В случае успеха возвращает токен доступа"""
-    token = create_jwt_token({"sub": user_in.username})
-    return Token(access_token=token, token_type="bearer")
+    """
+    Обмен refresh токена на новую пару токенов без проверки пароля.
+    Предъявленный refresh токен становится недействительным.
+    """
+    rotated = await crud.rotate(refresh_in.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal, refresh_token = rotated
+    token = create_access_token(principal.id, principal.username)
+    return Token(access_token=token, token_type="bearer", refresh_token=refresh_token)
 
 @router.post(
     "/logout",
@@ -49,16 +101,36 @@ def login(
         },
     },
 )
-def logout(token: Annotated[Token, Body()]):
-    blacklist.add(token.access_token)
+async def logout(
+    token: Annotated[LogoutRequest, Body()],
+    crud: Annotated[RefreshTokenCRUD, Depends(refresh_token_crud)],
+):
+    """
+    Отзыв токена: до истечения срока действия он больше не принимается.
+    Если передан refresh токен, отзывается все его семейство, даже когда
+    токен доступа уже истек или не передан: истекший токен доступа и так
+    не принимается, отзывать в нем нечего.
+    """
+    if token.refresh_token:
+        await crud.revoke(token.refresh_token)
+    if token.access_token:
+        try:
+            payload = decode_token(token.access_token)
+        except HTTPException:
+            if not token.refresh_token:
+                raise
+        else:
+            await revocation_store.revoke(payload["jti"], payload["exp"])
+            token_cache.pop(token.access_token)
+    elif not token.refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No token to revoke",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return {"msg": "Successfully logged out"}
 
 
-
-
-
 @router.get("/protected")
-def protected_route(token: str = Depends(oauth2_scheme)):
-    if token in blacklist:
-        raise HTTPException(status_code=403, detail="Token has been blacklisted")
-    return {"msg": "Access granted"}
\ No newline at end of file
+def protected_route(current_user: Annotated[Principal, Depends(get_current_user)]):
+    return {"msg": "Access granted"}
@@ -1,56 +1,57 @@
 from typing import Annotated
 from jose import jwt, JWTError, ExpiredSignatureError
-from fastapi import status, HTTPException
+from fastapi import status, HTTPException, Request
 from fastapi.security import (
     OAuth2PasswordBearer,
     OAuth2PasswordRequestForm,
 )
 from fastapi import Depends
 
-from core.security import verify_password, verify_string
+from core.security import verify_password_async, DUMMY_PASSWORD_HASH
+from core.revocation import revocation_store
+from core.cache import LRUCache
 from config import settings
 from .users.schemas import UserAuth
+from .token import Principal
 from .users.crud import UsersCRUD, users_crud
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Уже проверенные токены: повторный запрос с тем же токеном не декодирует его заново.
+# Запись живет до exp токена; отзыв все равно проверяется на каждом запросе.
+token_cache = LRUCache(maxsize=settings.api.token_cache_size)
+
 
 
 
 async def auth_user_oath2(
     credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
     crud: Annotated[UsersCRUD, Depends(users_crud)],
-):
+) -> UserAuth:
     """
     Функция для извлечения информации о пользователе из OAuth2PasswordBearer авторизации.
     Проверяем логин и пароль пользователя.
+    Пользователь ищется по уникальному индексу username, пароль проверяется ровно один раз.
     """
-    items = list(map(lambda us: UserAuth(**us), await crud.get_users_and_password()))
-    for item in items:
-        is_user_ok = verify_string(credentials.username, item.username)
-        is_pass_ok = verify_password(credentials.password, item.password_hash)
-        if is_user_ok and is_pass_ok:
-            return item
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await crud.get_auth_by_name(credentials.username)
+    if user is None:
+        await verify_password_async(credentials.password, DUMMY_PASSWORD_HASH)
+    elif await verify_password_async(credentials.password, user.password_hash):
+        return user
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 
-def get_current_user(credentials: Annotated[str, Depends(oauth2_scheme)]):
-    """Получение текущего пользователя из токена"""
+def decode_token(token: str) -> dict:
+    """Проверка подписи и срока действия токена, возвращает его содержимое"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        payload = jwt.decode(credentials, settings.api.secret_key)
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Unable to validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return username
+        payload = jwt.decode(token, settings.api.secret_key)
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,9 +64,48 @@ def get_current_user(credentials: Annotated[str, Depends(oauth2_scheme)]):
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not str(payload.get("sub", "")).isdigit() or payload.get("jti") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unable to validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token_cache.set(token, payload, expires_at=payload["exp"])
+    return payload
 
 
+async def get_current_user(
+    request: Request,
+    credentials: Annotated[str, Depends(oauth2_scheme)],
+) -> Principal:
+    """
+    Получение текущего пользователя из токена.
+    id пользователя запоминается в request.state для выбора сервера чтения
+    """
+    payload = decode_token(credentials)
+    if await revocation_store.is_revoked(payload["jti"]):
+        token_cache.pop(credentials)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal = Principal(id=int(payload["sub"]), username=payload.get("username", ""))
+    request.state.user_id = principal.id
+    return principal
 
 
-
-
+async def get_current_admin(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[UsersCRUD, Depends(users_crud)],
+) -> Principal:
+    """
+    Текущий пользователь, если он администратор.
+    Права выдаются флагом is_admin в админке
+    """
+    if not await crud.is_admin(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+
+
+def make_etag(record_id: int, updated_at: datetime) -> str:
+    """Слабый ETag записи: меняется при каждом изменении updated_at"""
+    return f'W/"{record_id}-{updated_at.strftime("%Y%m%d%H%M%S%f")}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Слабое сравнение ETag со значением If-None-Match или If-Match"""
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(item.strip().removeprefix("W/") == tag for item in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def precondition_failed() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        content={"detail": "Precondition Failed"},
+    )
@@ -1,8 +1,70 @@
 from collections.abc import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession
-from models.base import async_session
+from typing import Hashable
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from core.replicas import replica_router
+from models.base import async_engine, async_session
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession]:
+    """
+    Сессия для маршрутов с записью. Соединение берется из пула только
+    при первом запросе к БД, поэтому запрос, отклоненный раньше
+    (например, проверкой токена), пул не занимает
+    """
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+class ReadSession(Session):
+    """
+    Сессия только для чтения. Сервер (реплика или основной) выбирается
+    при первом запросе к БД, а не при создании сессии: к этому моменту все
+    зависимости маршрута, включая get_current_user, уже отработали.
+    Сервер, явно переданный в bind_arguments, используется как есть
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if kw.get("bind") is not None:
+            return kw["bind"]
+        bind = self.info.get("bind")
+        if bind is None:
+            request = self.info.get("request")
+            user_id = getattr(request.state, "user_id", None) if request else None
+            engine = replica_router.engine_for_read(user_id) or async_engine
+            bind = self.info["bind"] = engine.sync_engine
+        return bind
+
+
+read_async_session = async_sessionmaker(
+    sync_session_class=ReadSession,
+    expire_on_commit=False,
+)
+
+
+def read_session(request: Request | None = None) -> AsyncSession:
+    """
+    Сессия чтения на реплике, если есть подходящая, иначе на основном сервере.
+    По request учитывается read-your-writes для текущего пользователя
+    """
+    return read_async_session(info={"request": request})
+
+
+def primary_if_written(*keys: Hashable) -> dict:
+    """
+    bind_arguments для чтения с основного сервера, если по одному из ключей
+    недавно была запись. Кэш, сброшенный уведомлением, дочитывается
+    с основного: отстающая реплика вернула бы старое значение, и оно
+    осталось бы в кэше до конца ttl
+    """
+    if any(replica_router.written_recently(key) for key in keys):
+        return {"bind": async_engine.sync_engine}
+    return {}
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with read_session(request) as session:
+        yield session
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+
+from core.invalidation import cache_invalidator
+from core.replicas import replica_router
+from models.base import async_engine, replica_engines
+from .dependencies import get_current_admin, token_cache
+from .profiles.crud import profile_cache
+from .products.crud import catalog_cache, product_cache
+from .users.crud import user_cache
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", dependencies=[Depends(get_current_admin)])
+def metrics():
+    """Внутренние счетчики воркера: кэши, пулы и т.п. Только для администраторов"""
+    engines = {"primary": async_engine}
+    engines.update((f"replica-{i}", engine) for i, engine in enumerate(replica_engines))
+    return {
+        "token_cache": token_cache.stats,
+        "user_cache": user_cache.stats,
+        "profile_cache": profile_cache.stats,
+        "product_cache": product_cache.stats,
+        "catalog_cache": catalog_cache.stats,
+        "cache_invalidation": cache_invalidator.stats,
+        "replicas": replica_router.stats,
+        "db_pools": {
+            name: engine.pool.metrics.stats(engine.pool)
+            for name, engine in engines.items()
+        },
+    }
@@ -0,0 +1,181 @@
+"""
+Create
+Read
+"""
+
+from collections import Counter
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import Integer, column, insert, select, update, values
+from sqlalchemy.exc import DBAPIError, NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from core.invalidation import cache_invalidator
+from models import Order as OrderModel, OrderItem as OrderItemModel
+from models import Product as ProductModel
+from .schemas import OrderCreate, OrderDetail, OrderRead
+from ..products.crud import PRODUCT_READ_COLUMNS
+
+from ..get_session import get_async_session, get_read_session
+
+# Заказ, выбранный Postgres жертвой взаимоблокировки, повторяется
+DEADLOCK_SQLSTATE = "40P01"
+DEADLOCK_ATTEMPTS = 3
+
+
+class OutOfStock(Exception):
+    """Товаров с этими id на складе меньше, чем заказано"""
+
+    def __init__(self, product_ids: list[int]):
+        super().__init__(product_ids)
+        self.product_ids = product_ids
+
+
+class OrderCRUD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, owner_id: int, order_in: OrderCreate) -> OrderRead:
+        """
+        Заказ, его позиции и списание со склада в одной транзакции.
+        Остатки уменьшаются одним условным UPDATE: строка товара меняется,
+        только если его хватает, поэтому параллельные заказы не уходят в минус,
+        а ждут друг друга только на общих товарах.
+        Если хоть одного товара не хватает, транзакция откатывается целиком.
+        """
+        for attempt in range(1, DEADLOCK_ATTEMPTS + 1):
+            try:
+                return await self._create(owner_id, order_in)
+            except DBAPIError as exc:
+                deadlock = getattr(exc.orig, "sqlstate", None) == DEADLOCK_SQLSTATE
+                if not deadlock or attempt == DEADLOCK_ATTEMPTS:
+                    raise
+                await self.session.rollback()
+
+    async def _create(self, owner_id: int, order_in: OrderCreate) -> OrderRead:
+        quantities = Counter()
+        for item in order_in.items:
+            quantities[item.product_id] += item.quantity
+        # UPDATE блокирует строки товаров в порядке своего плана, а не в порядке
+        # VALUES, поэтому встречные заказы из нескольких позиций могут
+        # взаимоблокироваться. Postgres прерывает один из них, create его повторяет
+        wanted = values(
+            column("id", Integer), column("quantity", Integer), name="wanted"
+        ).data(sorted(quantities.items()))
+        statement = (
+            update(ProductModel)
+            .where(
+                ProductModel.id == wanted.c.id,
+                ProductModel.quantity >= wanted.c.quantity,
+            )
+            .values(quantity=ProductModel.quantity - wanted.c.quantity)
+            .returning(ProductModel.id, ProductModel.quantity)
+        )
+        reserved = dict((await self.session.execute(statement)).all())
+        if len(reserved) < len(quantities):
+            await self.session.rollback()
+            short = sorted(quantities.keys() - reserved)
+            statement = select(ProductModel.id).where(ProductModel.id.in_(short))
+            existing = (await self.session.execute(statement)).scalars().all()
+            if len(existing) < len(short):
+                raise NoResultFound("Product not found")
+            raise OutOfStock(short)
+
+        statement = (
+            insert(OrderModel)
+            .values(name=order_in.name, owner_id=owner_id)
+            .returning(OrderModel.id, OrderModel.name)
+        )
+        order = (await self.session.execute(statement)).one()
+        items = [
+            {"order_id": order.id, "item_id": product_id, "quantity": quantity}
+            for product_id, quantity in quantities.items()
+        ]
+        await self.session.execute(insert(OrderItemModel).values(items))
+        # UPDATE выше выполнен без ORM, события модели не сработали.
+        # Пока товар в наличии, изменился только остаток; закончившийся товар
+        # выпадает из выборок с фильтром in_stock, и сбрасывается весь каталог
+        changed = [
+            ("stock" if reserved[product_id] > 0 else "products", product_id)
+            for product_id in quantities
+        ]
+        for namespace, product_id in changed:
+            await cache_invalidator.notify(self.session, namespace, product_id)
+        # История заказов читается с реплики: уведомление включает для владельца
+        # read-your-writes во всех воркерах, и новый заказ сразу виден
+        await cache_invalidator.notify(self.session, "orders", owner_id)
+        await self.session.commit()
+        for namespace, product_id in changed:
+            cache_invalidator.evict(namespace, product_id)
+        cache_invalidator.evict("orders", owner_id)
+        return {
+            "id": order.id,
+            "name": order.name,
+            "items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in quantities.items()
+            ],
+        }
+
+    async def get_by_owner(
+        self, owner_id: int, after_id: int | None, limit: int
+    ) -> tuple[list[OrderDetail], int | None]:
+        """
+        Страница заказов пользователя по возрастанию id вместе с позициями
+        и товарами. Число запросов не зависит от числа заказов: заказы,
+        затем позиции всех заказов страницы одним IN с товарами через JOIN.
+        Связи моделей объявлены с lazy="raise", так что забытая здесь
+        загрузка сразу падает, а не превращается в запрос на каждую строку.
+        """
+        statement = (
+            select(OrderModel)
+            .where(OrderModel.owner_id == owner_id)
+            .order_by(OrderModel.id)
+            .limit(limit + 1)
+            .options(
+                selectinload(OrderModel.order_item).joinedload(OrderItemModel.item)
+            )
+        )
+        if after_id is not None:
+            statement = statement.where(OrderModel.id > after_id)
+        orders = (await self.session.execute(statement)).scalars().all()
+        last_id = orders[limit - 1].id if len(orders) > limit else None
+        return [
+            {
+                "id": order.id,
+                "name": order.name,
+                "created_at": order.created_at,
+                "items": [
+                    {
+                        "product_id": order_item.item_id,
+                        "quantity": order_item.quantity,
+                        "product": {
+                            attribute.key: getattr(order_item.item, attribute.key)
+                            for attribute in PRODUCT_READ_COLUMNS
+                        },
+                    }
+                    for order_item in order.order_item
+                ],
+            }
+            for order in orders[:limit]
+        ], last_id
+
+
+def orders_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_async_session),
+    ],
+) -> OrderCRUD:
+    return OrderCRUD(session)
+
+
+def orders_read_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_read_session),
+    ],
+) -> OrderCRUD:
+    return OrderCRUD(session)
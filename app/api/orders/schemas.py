@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+from ..products.schemas import ProductRead
+
+
+class OrderItemCreate(BaseModel):
+    product_id: Annotated[int, Field(description="id товара")]
+    quantity: Annotated[int, Field(ge=1, description="Количество")] = 1
+
+
+class OrderCreate(BaseModel):
+    """Новый заказ: название и список позиций"""
+
+    name: Annotated[str, Field(max_length=50, description="Название заказа")] = ""
+    items: Annotated[
+        list[OrderItemCreate],
+        Field(min_length=1, max_length=100, description="Позиции заказа"),
+    ]
+
+
+class OrderItemRead(BaseModel):
+    product_id: int
+    quantity: int
+
+
+class OrderRead(BaseModel):
+    id: int
+    name: str
+    items: list[OrderItemRead]
+
+
+class OrderItemDetail(OrderItemRead):
+    product: ProductRead
+
+
+class OrderDetail(BaseModel):
+    """Заказ с позициями и товарами для истории заказов"""
+
+    id: int
+    name: str
+    created_at: datetime
+    items: list[OrderItemDetail]
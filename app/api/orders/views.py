@@ -0,0 +1,115 @@
+from typing import Annotated
+from fastapi import APIRouter, Body, status, Depends
+from fastapi.responses import JSONResponse
+
+from sqlalchemy.exc import NoResultFound, InterfaceError, IntegrityError
+
+from .crud import OrderCRUD, OutOfStock, orders_crud, orders_read_crud
+from .schemas import OrderCreate, OrderDetail, OrderRead
+from ..dependencies import get_current_user
+from ..pagination import Page, PageParams, page_params, next_cursor
+from ..responses import FastJSONResponse
+from ..token import Principal
+
+router = APIRouter(tags=["Orders"], prefix="/api")
+
+
+@router.post(
+    "/orders",
+    status_code=status.HTTP_201_CREATED,
+    response_model=OrderRead,
+    summary="Place order",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Product not found",
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Insufficient stock",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Insufficient stock",
+                        "product_ids": [1],
+                    }
+                }
+            },
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def place_order(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[OrderCRUD, Depends(orders_crud)],
+    order_in: Annotated[OrderCreate, Body()],
+):
+    """
+    Этот маршрут защищен и требует токен. Создает заказ текущего пользователя
+    и списывает товары со склада. Если какого-то товара не хватает,
+    заказ не создается и возвращается 409 со списком таких товаров.
+    """
+    try:
+        order = await crud.create(current_user.id, order_in)
+    except OutOfStock as error:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "detail": "Insufficient stock",
+                "product_ids": error.product_ids,
+            },
+        )
+    except NoResultFound:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"detail": "Product not found"},
+        )
+    except IntegrityError:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": "Order conflicts with current data"},
+        )
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    return order
+
+
+@router.get(
+    "/users/me/orders",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[OrderDetail],
+    summary="List my orders",
+    responses={
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def my_orders(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    page: Annotated[PageParams, Depends(page_params)],
+    crud: Annotated[OrderCRUD, Depends(orders_read_crud)],
+):
+    """
+    Этот маршрут защищен и требует токен. История заказов текущего пользователя
+    с позициями и товарами, постранично. Для следующей страницы передайте
+    next_cursor в параметре cursor.
+    """
+    try:
+        orders, last_id = await crud.get_by_owner(
+            current_user.id, page.after_id, page.limit
+        )
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    return FastJSONResponse(
+        {
+            "items": orders,
+            "next_cursor": next_cursor(last_id),
+        }
+    )
@@ -0,0 +1,120 @@
+import base64
+import binascii
+import json
+import math
+from typing import Annotated, Generic, TypeVar
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+from config import settings
+
+T = TypeVar("T")
+
+# id из курсора передается в параметр типа INTEGER
+MAX_ID = 2**31 - 1
+
+
+class Page(BaseModel, Generic[T]):
+    """Страница списка и курсор следующей страницы"""
+
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class PageParams(BaseModel):
+    """Параметры keyset-пагинации: id последней записи предыдущей страницы и размер"""
+
+    after_id: int | None = None
+    limit: int
+
+
+class RankedPageParams(BaseModel):
+    """
+    Параметры keyset-пагинации списка, упорядоченного по убыванию ранга:
+    ранг и id последней записи предыдущей страницы и размер
+    """
+
+    after_rank: float | None = None
+    after_id: int | None = None
+    limit: int
+
+
+def encode_cursor(values: dict) -> str:
+    """Непрозрачный курсор для клиента"""
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        values = None
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+def is_valid_id(value) -> bool:
+    """bool не считается числом, id вне диапазона INTEGER отклоняется до запроса"""
+    return type(value) is int and 1 <= value <= MAX_ID
+
+
+def page_params(
+    cursor: Annotated[
+        str | None, Query(description="Курсор следующей страницы")
+    ] = None,
+    limit: Annotated[
+        int, Query(ge=1, description="Размер страницы")
+    ] = settings.api.page_size,
+) -> PageParams:
+    after_id = None
+    if cursor is not None:
+        after_id = decode_cursor(cursor).get("id")
+        if not is_valid_id(after_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+    return PageParams(after_id=after_id, limit=min(limit, settings.api.max_page_size))
+
+
+def next_cursor(last_id: int | None) -> str | None:
+    return encode_cursor({"id": last_id}) if last_id is not None else None
+
+
+def ranked_page_params(
+    cursor: Annotated[
+        str | None, Query(description="Курсор следующей страницы")
+    ] = None,
+    limit: Annotated[
+        int, Query(ge=1, description="Размер страницы")
+    ] = settings.api.page_size,
+) -> RankedPageParams:
+    after_rank = after_id = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        after_rank, after_id = values.get("rank"), values.get("id")
+        # json.loads принимает NaN и Infinity, с ними сравнение рангов бессмысленно
+        if (
+            type(after_rank) not in (int, float)
+            or not math.isfinite(after_rank)
+            or not is_valid_id(after_id)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+    return RankedPageParams(
+        after_rank=after_rank,
+        after_id=after_id,
+        limit=min(limit, settings.api.max_page_size),
+    )
+
+
+def next_ranked_cursor(last: tuple[float, int] | None) -> str | None:
+    if last is None:
+        return None
+    rank, last_id = last
+    return encode_cursor({"rank": rank, "id": last_id})
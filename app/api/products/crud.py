@@ -0,0 +1,209 @@
+"""
+Read
+"""
+
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import Float, and_, cast, event, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.cache import LRUCache
+from core.invalidation import cache_invalidator
+from core.replicas import replica_router
+from models import Product as ProductModel
+from models.product import SEARCH_CONFIG
+from .schemas import ProductFilter, ProductRead
+
+from ..get_session import get_read_session, primary_if_written
+
+# Колонки, из которых собирается ProductRead
+PRODUCT_READ_COLUMNS = (
+    ProductModel.id,
+    ProductModel.name,
+    ProductModel.description,
+    ProductModel.price,
+    ProductModel.quantity,
+    ProductModel.image_url,
+)
+
+# Товары по id и страницы каталога, общие на воркер.
+# Изменение товара (namespace "products") сбрасывает сам товар и все страницы
+# каталога: на какие страницы он попадает после изменения, заранее неизвестно.
+# Заказ, после которого товар остался в наличии, меняет только остаток
+# (namespace "stock"): сбрасываются товар и страницы, на которых он есть,
+# остальные выборки от такого изменения не зависят.
+# Страница хранится как (товары, курсор, множество id товаров)
+product_cache = cache_invalidator.register(
+    "products",
+    LRUCache(settings.api.catalog_cache_size, ttl=settings.api.catalog_cache_ttl),
+)
+cache_invalidator.register("stock", product_cache)
+catalog_cache = cache_invalidator.register(
+    "products",
+    LRUCache(settings.api.catalog_cache_size, ttl=settings.api.catalog_cache_ttl),
+)
+cache_invalidator.subscribe("products", lambda product_id: catalog_cache.clear())
+cache_invalidator.subscribe(
+    "stock",
+    lambda product_id: catalog_cache.pop_where(lambda page: product_id in page[2]),
+)
+
+# Ключи недавних изменений для replica_router: товар и каталог целиком
+CATALOG_KEY = ("products", "catalog")
+
+
+def mark_product_write(product_id: int) -> None:
+    replica_router.mark_write(("products", product_id))
+    replica_router.mark_write(CATALOG_KEY)
+
+
+cache_invalidator.subscribe("products", mark_product_write)
+cache_invalidator.subscribe("stock", mark_product_write)
+
+
+@event.listens_for(ProductModel, "after_insert")
+@event.listens_for(ProductModel, "after_update")
+@event.listens_for(ProductModel, "after_delete")
+def notify_product_changed(mapper, connection, target):
+    """Товары меняются через ORM (админка): уведомление уходит в той же транзакции"""
+    connection.execute(cache_invalidator.notify_statement("products", target.id))
+
+
+class ProductCRUD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_by_id(self, product_id: int) -> ProductRead:
+        """Чтение через product_cache, промах дочитывается из БД и кэшируется"""
+        product = product_cache.get(product_id)
+        if product is not None:
+            return product
+        generation = cache_invalidator.generation
+        statement = select(*PRODUCT_READ_COLUMNS, ProductModel.updated_at).where(
+            ProductModel.id == product_id
+        )
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(("products", product_id))
+        )
+        product = result.one()._asdict()
+        cache_invalidator.fill(product_cache, product_id, product, generation)
+        return product
+
+    async def get_version(self, product_id: int) -> datetime:
+        """Время последнего изменения товара, по нему строится ETag"""
+        product = product_cache.get(product_id)
+        if product is not None:
+            return product["updated_at"]
+        statement = select(ProductModel.updated_at).where(ProductModel.id == product_id)
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(("products", product_id))
+        )
+        return result.scalar_one()
+
+    async def get(
+        self, after_id: int | None, limit: int, filters: ProductFilter
+    ) -> tuple[list, int | None]:
+        """
+        Страница каталога по возрастанию id, начиная после after_id.
+        Страницы кэшируются целиком по параметрам запроса.
+        """
+        key = (after_id, limit, *filters.model_dump().values())
+        page = catalog_cache.get(key)
+        if page is not None:
+            return page[:2]
+        generation = cache_invalidator.generation
+        statement = (
+            select(*PRODUCT_READ_COLUMNS).order_by(ProductModel.id).limit(limit + 1)
+        )
+        if after_id is not None:
+            statement = statement.where(ProductModel.id > after_id)
+        if filters.min_price is not None:
+            statement = statement.where(ProductModel.price >= filters.min_price)
+        if filters.max_price is not None:
+            statement = statement.where(ProductModel.price <= filters.max_price)
+        if filters.in_stock is True:
+            statement = statement.where(ProductModel.quantity > 0)
+        elif filters.in_stock is False:
+            statement = statement.where(ProductModel.quantity <= 0)
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(CATALOG_KEY)
+        )
+        products = result.all()
+        last_id = products[limit - 1].id if len(products) > limit else None
+        items = [product._asdict() for product in products[:limit]]
+        ids = frozenset(item["id"] for item in items)
+        cache_invalidator.fill(catalog_cache, key, (items, last_id, ids), generation)
+        return items, last_id
+
+    async def search(
+        self,
+        query: str,
+        after: tuple[float, int] | None,
+        limit: int,
+    ) -> tuple[list, tuple[float, int] | None]:
+        """
+        Поиск по названию и описанию. Совпадения ищутся по индексу GIN
+        на search_vector, а по названию еще и по триграммам (опечатки,
+        начало слова). Выдача по убыванию ранга, затем по id.
+        Возвращает страницу и (ранг, id) последней записи для курсора.
+        """
+        key = ("search", query, after, limit)
+        page = catalog_cache.get(key)
+        if page is not None:
+            return page[:2]
+        generation = cache_invalidator.generation
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = cast(
+            func.ts_rank_cd(ProductModel.search_vector, tsquery)
+            + func.word_similarity(query, ProductModel.name),
+            Float,
+        )
+        matches = (
+            select(*PRODUCT_READ_COLUMNS, rank.label("rank"))
+            .where(
+                or_(
+                    ProductModel.search_vector.bool_op("@@")(tsquery),
+                    literal(query).bool_op("<%")(ProductModel.name),
+                )
+            )
+            .subquery()
+        )
+        statement = (
+            select(matches)
+            .order_by(matches.c.rank.desc(), matches.c.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            after_rank, after_id = after
+            statement = statement.where(
+                or_(
+                    matches.c.rank < after_rank,
+                    and_(matches.c.rank == after_rank, matches.c.id > after_id),
+                )
+            )
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(CATALOG_KEY)
+        )
+        products = result.mappings().all()
+        last = None
+        if len(products) > limit:
+            last = products[limit - 1]["rank"], products[limit - 1]["id"]
+        items = [
+            {column: product[column] for column in product.keys() if column != "rank"}
+            for product in products[:limit]
+        ]
+        ids = frozenset(item["id"] for item in items)
+        cache_invalidator.fill(catalog_cache, key, (items, last, ids), generation)
+        return items, last
+
+
+def product_read_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_read_session),
+    ],
+) -> ProductCRUD:
+    return ProductCRUD(session)
@@ -0,0 +1,30 @@
+from decimal import Decimal
+from typing import Annotated, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProductRead(BaseModel):
+    id: int
+    name: Annotated[str, Field(description="Название товара")]
+    description: Annotated[str, Field(description="Описание товара")]
+    price: Annotated[Decimal, Field(description="Цена")]
+    quantity: Annotated[int, Field(description="Количество на складе")]
+    image_url: Annotated[str, Field(description="Ссылка на изображение")]
+
+
+class ProductFilter(BaseModel):
+    """Фильтры списка товаров"""
+
+    min_price: Annotated[
+        Optional[Decimal],
+        Field(ge=0, description="Цена не ниже"),
+    ] = None
+    max_price: Annotated[
+        Optional[Decimal],
+        Field(ge=0, description="Цена не выше"),
+    ] = None
+    in_stock: Annotated[
+        Optional[bool],
+        Field(description="true - только в наличии, false - только отсутствующие"),
+    ] = None
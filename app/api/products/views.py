@@ -0,0 +1,133 @@
+from typing import Annotated
+from fastapi import APIRouter, Header, Query, Response, status, Depends
+from fastapi.responses import JSONResponse
+
+from sqlalchemy.exc import NoResultFound, InterfaceError
+
+from .crud import ProductCRUD, product_read_crud
+from .schemas import ProductFilter, ProductRead
+from ..etag import etag_matches, make_etag, not_modified
+from ..pagination import (
+    Page,
+    PageParams,
+    RankedPageParams,
+    next_cursor,
+    next_ranked_cursor,
+    page_params,
+    ranked_page_params,
+)
+from ..responses import FastJSONResponse
+
+router = APIRouter(tags=["Products"], prefix="/api/products")
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[ProductRead],
+    summary="List products",
+)
+async def all_products(
+    page: Annotated[PageParams, Depends(page_params)],
+    filters: Annotated[ProductFilter, Query()],
+    crud: Annotated[ProductCRUD, Depends(product_read_crud)],
+):
+    """
+    Постраничный каталог с фильтрами по цене и наличию.
+    Для следующей страницы передайте next_cursor в параметре cursor и те же фильтры.
+    """
+    try:
+        products, last_id = await crud.get(page.after_id, page.limit, filters)
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    return FastJSONResponse(
+        {
+            "items": products,
+            "next_cursor": next_cursor(last_id),
+        }
+    )
+
+
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[ProductRead],
+    summary="Search products",
+)
+async def search_products(
+    q: Annotated[
+        str, Query(min_length=1, max_length=100, description="Поисковый запрос")
+    ],
+    page: Annotated[RankedPageParams, Depends(ranked_page_params)],
+    crud: Annotated[ProductCRUD, Depends(product_read_crud)],
+):
+    """
+    Полнотекстовый поиск по названию и описанию, устойчивый к опечаткам в названии.
+    Результаты упорядочены по релевантности. Для следующей страницы
+    передайте next_cursor в параметре cursor и тот же запрос.
+    """
+    after = None
+    if page.after_id is not None:
+        after = page.after_rank, page.after_id
+    try:
+        products, last = await crud.search(q, after, page.limit)
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    return FastJSONResponse(
+        {
+            "items": products,
+            "next_cursor": next_ranked_cursor(last),
+        }
+    )
+
+
+@router.get(
+    "/{product_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=ProductRead,
+    summary="Get product",
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "Product not modified",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Product not found",
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def get_product(
+    product_id: int,
+    crud: Annotated[ProductCRUD, Depends(product_read_crud)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Карточка товара. Если ETag из If-None-Match совпадает с текущим, возвращается 304 без тела.
+    """
+    try:
+        if if_none_match is not None:
+            etag = make_etag(product_id, await crud.get_version(product_id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        product = await crud.get_by_id(product_id)
+    except NoResultFound:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"detail": "Product not found"},
+        )
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    response.headers["ETag"] = make_etag(product_id, product["updated_at"])
+    return product
@@ -5,70 +5,170 @@ Update
 Delete
 """
 
+from collections.abc import AsyncIterator
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import Depends
-from sqlalchemy import select, update, delete
+from sqlalchemy import event, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from .schemas import Profile, ProfileRead, default_profile
-from models import Profile as ProfileModel, User as UserModel
+from config import settings
+from core.cache import LRUCache
+from core.invalidation import cache_invalidator
+from .schemas import Profile, ProfileRead, ProfileUpdate, default_profile
+from models import Profile as ProfileModel
 
-from ..get_session import get_async_session
+from ..get_session import get_async_session, get_read_session, primary_if_written
+
+# Колонки, из которых собирается ProfileRead
+PROFILE_READ_COLUMNS = (
+    ProfileModel.first_name,
+    ProfileModel.last_name,
+    ProfileModel.phone,
+)
+
+# Профили по id пользователя, общий на воркер; сбрасывается через cache_invalidator
+profile_cache = cache_invalidator.register(
+    "users", LRUCache(settings.api.user_cache_size, ttl=settings.api.user_cache_ttl)
+)
+
+
+@event.listens_for(ProfileModel, "after_update")
+@event.listens_for(ProfileModel, "after_delete")
+def notify_profile_changed(mapper, connection, target):
+    """Изменения через ORM (админка) тоже сбрасывают кэши во всех воркерах"""
+    connection.execute(cache_invalidator.notify_statement("users", target.user_id))
+
+
+def profile_params(profile_in: ProfileRead) -> dict:
+    """
+    Значения профиля для записи в БД. Поля, совпадающие с примером
+    default_profile, пропускаются: для них остаются значения по умолчанию.
+    Используется при регистрации, импорте и изменении профиля
+    """
+    default_params = default_profile.model_dump()
+    return {k: w for k, w in profile_in.model_dump().items() if default_params[k] != w}
 
 
 class ProfileCRUD:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create(self, user_id: int, profile_in: ProfileRead) -> Profile:
-        params = profile_in.model_dump()
-        default_params = default_profile.model_dump()
-        params = {k: w for k, w in params.items() if default_params[k] != w}
-        params["user_id"] = user_id
-        profile = ProfileModel(**params)
-        self.session.add(profile)
-        profile_out = profile.get_schemas
+    async def update(self, user_id: int, profile_in: ProfileRead) -> Profile:
+        params = profile_params(profile_in)
+        statement = (
+            update(ProfileModel)
+            .where(ProfileModel.user_id == user_id)
+            .values(**params)
+            .returning(*PROFILE_READ_COLUMNS, ProfileModel.updated_at)
+        )
+        profile = (await self.session.execute(statement)).one()
+        await cache_invalidator.notify(self.session, "users", user_id)
         await self.session.commit()
-        return profile_out
+        cache_invalidator.evict("users", user_id)
+        return profile._asdict()
 
-    async def update(self, current_user: str, profile_in: ProfileRead) -> Profile:
-        params = profile_in.model_dump()
-        default_params = default_profile.model_dump()
-        params = {k: w for k, w in params.items() if default_params[k] != w}
-        user_id = await self.get_id_by_name(current_user)
+    async def patch(self, user_id: int, profile_in: ProfileUpdate) -> Profile:
+        """
+        Изменяются только переданные поля, отличающиеся от текущих значений.
+        Если менять нечего, запись в БД не выполняется.
+        """
+        changes = profile_in.model_dump(exclude_unset=True, exclude_none=True)
+        statement = select(*PROFILE_READ_COLUMNS, ProfileModel.updated_at).where(
+            ProfileModel.user_id == user_id
+        )
+        current = (await self.session.execute(statement)).one()
+        params = {k: w for k, w in changes.items() if getattr(current, k) != w}
+        if not params:
+            return current._asdict()
         statement = (
-            update(ProfileModel).where(ProfileModel.user_id == user_id).values(**params)
+            update(ProfileModel)
+            .where(ProfileModel.user_id == user_id)
+            .values(**params)
+            .returning(*PROFILE_READ_COLUMNS, ProfileModel.updated_at)
         )
-        await self.session.execute(statement)
+        profile = (await self.session.execute(statement)).one()
+        await cache_invalidator.notify(self.session, "users", user_id)
         await self.session.commit()
-        profile_out = await self.get_by_name(current_user)
-        return profile_out
-
-    async def get_by_name(self, username: str) -> Profile:
-        statement = select(UserModel).where(UserModel.username == username)
-        user = await self.session.scalars(statement)
-        user_id = user.one().id
-        statement = select(ProfileModel).where(ProfileModel.user_id == user_id)
-        profile = await self.session.scalars(statement)
-        profile_out = profile.one().get_schemas
-        return profile_out
-
-    async def get_id_by_name(self, username: str) -> int:
-        statement = select(UserModel).where(UserModel.username == username)
-        user = await self.session.scalars(statement)
-        user_id = user.one().id
-        statement = select(ProfileModel).where(ProfileModel.user_id == user_id)
-        profile = await self.session.scalars(statement)
-        user_id = profile.one().user_id
-        return user_id
-
-    async def get(self) -> list:
-        profile_list = []
-        statement = select(ProfileModel).order_by(ProfileModel.id)
-        profiles = await self.session.scalars(statement)
-        for profile in profiles:
-            profile_list.append(profile.get_schemas)
-        return profile_list
+        cache_invalidator.evict("users", user_id)
+        return profile._asdict()
+
+    async def get_by_user_id(self, user_id: int) -> Profile:
+        """Чтение через profile_cache, промах дочитывается из БД и кэшируется"""
+        profile = profile_cache.get(user_id)
+        if profile is not None:
+            return profile
+        generation = cache_invalidator.generation
+        statement = select(*PROFILE_READ_COLUMNS, ProfileModel.updated_at).where(
+            ProfileModel.user_id == user_id
+        )
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(user_id)
+        )
+        profile = result.one()._asdict()
+        cache_invalidator.fill(profile_cache, user_id, profile, generation)
+        return profile
+
+    async def get_version(self, user_id: int) -> datetime:
+        """Время последнего изменения профиля, по нему строится ETag"""
+        profile = profile_cache.get(user_id)
+        if profile is not None:
+            return profile["updated_at"]
+        statement = select(ProfileModel.updated_at).where(
+            ProfileModel.user_id == user_id
+        )
+        return (await self.session.execute(statement)).scalar_one()
+
+    async def lock_version(self, user_id: int) -> datetime:
+        """
+        То же, что get_version, но строка блокируется до конца транзакции,
+        чтобы проверка If-Match и следующее изменение были атомарны
+        """
+        statement = (
+            select(ProfileModel.updated_at)
+            .where(ProfileModel.user_id == user_id)
+            .with_for_update()
+        )
+        return (await self.session.execute(statement)).scalar_one()
+
+    async def get(self, after_id: int | None, limit: int) -> tuple[list, int | None]:
+        """
+        Страница записей по возрастанию id, начиная после after_id.
+        Выбираются только нужные колонки, ORM-объекты не создаются.
+        """
+        statement = (
+            select(ProfileModel.id, *PROFILE_READ_COLUMNS)
+            .order_by(ProfileModel.id)
+            .limit(limit + 1)
+        )
+        if after_id is not None:
+            statement = statement.where(ProfileModel.id > after_id)
+        profiles = (await self.session.execute(statement)).all()
+        last_id = profiles[limit - 1].id if len(profiles) > limit else None
+        return [
+            {
+                "first_name": profile.first_name,
+                "last_name": profile.last_name,
+                "phone": profile.phone,
+            }
+            for profile in profiles[:limit]
+        ], last_id
+
+    async def stream(self, batch_size: int) -> AsyncIterator[list[dict]]:
+        """Выгрузка всей таблицы серверным курсором, пачками по batch_size строк"""
+        statement = (
+            select(
+                ProfileModel.user_id,
+                ProfileModel.first_name,
+                ProfileModel.last_name,
+                ProfileModel.phone,
+            )
+            .order_by(ProfileModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(statement)
+        async for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
 
 
 def profile_crud(
@@ -78,3 +178,13 @@ def profile_crud(
     ],
 ) -> ProfileCRUD:
     return ProfileCRUD(session)
+
+
+def profile_read_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_read_session),
+    ],
+) -> ProfileCRUD:
+    """CRUD на сессии для чтения, для маршрутов без записи"""
+    return ProfileCRUD(session)
@@ -25,6 +25,42 @@ class ProfileRead(BaseModel):
     #         raise ValueError('Неправильный ввод.')
 
 
+class ProfileOut(BaseModel):
+    """
+    Профиль в ответах. Поля без ограничений ProfileRead: если профиль
+    не передали при регистрации, в БД хранятся пустые строки
+    """
+    first_name: str = ""
+    last_name: str = ""
+    phone: str = ""
+
+
+class ProfileUpdate(BaseModel):
+    """Частичное изменение профиля: учитываются только переданные поля"""
+    first_name: Annotated[
+        Optional[str],
+        Field(max_length=30, description="Имя пользователя, до 50 символов"),
+    ] = None
+    last_name: Annotated[
+        Optional[str],
+        Field(max_length=30, description="Фамилия пользователя, до 50 символов"),
+    ] = None
+    phone: Annotated[
+        Optional[str],
+        Field(
+            min_length=5,
+            max_length=15,
+            description="Номер телефона в международном формате, начинающийся с '+'",
+        ),
+    ] = None
+
+
+class ProfileInfo(BaseModel):
+    """Ответ с информацией о профиле пользователя"""
+    description: str
+    user_info: Annotated[ProfileOut, Field(alias="user info")]
+
+
 class Profile(ProfileRead):
     user_id: Annotated[int, Field()]
 
@@ -1,12 +1,24 @@
 from typing import Annotated
-from fastapi import APIRouter, Body, status, Depends
+from fastapi import APIRouter, Body, Header, Query, Response, status, Depends
 from fastapi.responses import JSONResponse
 
 from sqlalchemy.exc import NoResultFound, InterfaceError, IntegrityError
 
-from .crud import ProfileCRUD, profile_crud
-from .schemas import ProfileRead, default_profile, Profile
-from ..dependencies import get_current_user
+from .crud import ProfileCRUD, profile_crud, profile_read_crud
+from .schemas import (
+    ProfileInfo,
+    ProfileOut,
+    ProfileRead,
+    ProfileUpdate,
+    default_profile,
+)
+from ..dependencies import get_current_admin, get_current_user
+from ..get_session import read_session
+from ..etag import etag_matches, make_etag, not_modified, precondition_failed
+from ..pagination import Page, PageParams, page_params, next_cursor
+from ..responses import FastJSONResponse
+from ..export import EXPORT_BATCH_SIZE, ExportFormat, export_response
+from ..token import Principal
 
 router = APIRouter(tags=["Profile"], prefix="/api/users")
 
@@ -14,6 +26,7 @@ router = APIRouter(tags=["Profile"], prefix="/api/users")
 @router.get(
     "/me/profile",
     status_code=status.HTTP_200_OK,
+    response_model=ProfileInfo,
     summary="Get user info",
     responses={
         status.HTTP_200_OK: {
@@ -36,14 +49,21 @@ router = APIRouter(tags=["Profile"], prefix="/api/users")
     },
 )
 async def about_me(
-    current_user: Annotated[str, Depends(get_current_user)],
-    crud: Annotated[ProfileCRUD, Depends(profile_crud)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[ProfileCRUD, Depends(profile_read_crud)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Этот маршрут защищен и требует токен. Если токен действителен, мы возвращаем информацию о пользователе.
+    Если ETag из If-None-Match совпадает с текущим, возвращается 304 без тела.
     """
     try:
-        profile = await crud.get_by_name(current_user)
+        if if_none_match is not None:
+            etag = make_etag(current_user.id, await crud.get_version(current_user.id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        profile = await crud.get_by_user_id(current_user.id)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -53,6 +73,7 @@ async def about_me(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
+    response.headers["ETag"] = make_etag(current_user.id, profile["updated_at"])
     return {
         "description": "User info",
         "user info": profile,
@@ -63,6 +84,7 @@ async def about_me(
 @router.put(
     "/me/profile",
     status_code=status.HTTP_200_OK,
+    response_model=ProfileInfo,
     summary="Update user",
     responses={
         status.HTTP_200_OK: {
@@ -85,15 +107,81 @@ async def about_me(
     },
 )
 async def update_user_profile(
-    current_user: Annotated[str, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     crud: Annotated[ProfileCRUD, Depends(profile_crud)],
+    response: Response,
     profile_in: Annotated[ProfileRead, Body()] = default_profile,
+    if_match: Annotated[str | None, Header()] = None,
 ):
     """
     Этот маршрут защищен и требует токен. Если токен действителен, мы можем изменить информацию о пользователе.
+    С заголовком If-Match изменение выполняется, только если ETag не изменился.
+    """
+    try:
+        if if_match is not None:
+            etag = make_etag(current_user.id, await crud.lock_version(current_user.id))
+            if not etag_matches(if_match, etag):
+                return precondition_failed()
+        profile = await crud.update(current_user.id, profile_in)
+    except NoResultFound:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
+        )
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    response.headers["ETag"] = make_etag(current_user.id, profile["updated_at"])
+    return {
+        "description": "User updated",
+        "user info": profile,
+    }
+
+
+@router.patch(
+    "/me/profile",
+    status_code=status.HTTP_200_OK,
+    response_model=ProfileInfo,
+    summary="Partially update user profile",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "User updated",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "User updated",
+                        "user info": {},
+                    }
+                }
+            },
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "User not found",
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def patch_user_profile(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[ProfileCRUD, Depends(profile_crud)],
+    response: Response,
+    profile_in: Annotated[ProfileUpdate, Body()],
+    if_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Этот маршрут защищен и требует токен. Изменяются только переданные поля.
+    Если ничего не изменилось, запись в БД не выполняется.
+    С заголовком If-Match изменение выполняется, только если ETag не изменился.
     """
     try:
-        profile = await crud.update(current_user, profile_in)
+        if if_match is not None:
+            etag = make_etag(current_user.id, await crud.lock_version(current_user.id))
+            if not etag_matches(if_match, etag):
+                return precondition_failed()
+        profile = await crud.patch(current_user.id, profile_in)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -103,6 +191,7 @@ async def update_user_profile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
+    response.headers["ETag"] = make_etag(current_user.id, profile["updated_at"])
     return {
         "description": "User updated",
         "user info": profile,
@@ -112,15 +201,17 @@ async def update_user_profile(
 @router.get(
     "/profiles",
     status_code=status.HTTP_200_OK,
+    response_model=Page[ProfileOut],
 )
 async def all_profiles(
-    crud: Annotated[ProfileCRUD, Depends(profile_crud)],
+    page: Annotated[PageParams, Depends(page_params)],
+    crud: Annotated[ProfileCRUD, Depends(profile_read_crud)],
 ):
     """
-    Этот маршрут защищен и требует токен. Если токен действителен, мы возвращаем информацию о пользователе.
+    Постраничный список. Для следующей страницы передайте next_cursor в параметре cursor.
     """
     try:
-        users = await crud.get()
+        users, last_id = await crud.get(page.after_id, page.limit)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -130,4 +221,36 @@ async def all_profiles(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
-    return users
+    return FastJSONResponse(
+        {
+            "items": users,
+            "next_cursor": next_cursor(last_id),
+        }
+    )
+
+
+@router.get(
+    "/profiles/export",
+    status_code=status.HTTP_200_OK,
+    summary="Export profiles",
+)
+async def export_profiles(
+    current_user: Annotated[Principal, Depends(get_current_admin)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+):
+    """
+    Этот маршрут доступен только администраторам.
+    Потоковая выгрузка всех профилей в NDJSON или CSV.
+    """
+
+    async def batches():
+        async with read_session() as session:
+            async for rows in ProfileCRUD(session).stream(EXPORT_BATCH_SIZE):
+                yield rows
+
+    return export_response(
+        batches(),
+        ["user_id", "first_name", "last_name", "phone"],
+        export_format,
+        "profiles",
+    )
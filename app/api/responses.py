@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+_json_adapter = TypeAdapter(Any)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ, который сериализуется pydantic-core сразу в bytes,
+    без jsonable_encoder и стандартного json.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _json_adapter.dump_json(content)
@@ -3,4 +3,23 @@ from pydantic import BaseModel
 class Token(BaseModel):
     """Модель, используемая для ответа токеном при авторизации"""
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshRequest(BaseModel):
+    """Модель запроса нового токена доступа по refresh токену"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Модель запроса выхода: токены, которые нужно отозвать"""
+    access_token: str | None = None
+    token_type: str = "bearer"
+    refresh_token: str | None = None
+
+
+class Principal(BaseModel):
+    """Текущий пользователь, извлеченный из токена доступа"""
+    id: int
+    username: str
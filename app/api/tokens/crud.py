@@ -0,0 +1,127 @@
+"""
+Create
+Read
+Update
+Delete
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import select, update, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.security import (
+    create_refresh_token,
+    hash_refresh_token,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+)
+from models import RefreshToken as RefreshTokenModel, User as UserModel
+
+from ..get_session import get_async_session
+from ..token import Principal
+
+# Сколько истекших токенов удаляется при выдаче каждого нового
+PURGE_BATCH_SIZE = 100
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RefreshTokenCRUD:
+    """
+    Refresh токены хранятся в виде sha256 хэша.
+    Каждый токен одноразовый: при обмене выдается новый токен того же семейства.
+    Повторное предъявление уже использованного токена отзывает все семейство.
+    Истекшие записи удаляются понемногу при выдаче новых, так что таблица
+    не растет бесконечно; истекший токен и без записи не принимается.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def issue(self, user_id: int, family_id: str | None = None) -> str:
+        token = create_refresh_token()
+        statement = insert(RefreshTokenModel).values(
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        await self.session.execute(statement)
+        await self.purge_expired()
+        await self.session.commit()
+        return token
+
+    async def purge_expired(self) -> None:
+        """
+        Удаление не более PURGE_BATCH_SIZE истекших токенов по индексу expires_at.
+        Строки, которые удаляет параллельный запрос, пропускаются, а не ждут
+        """
+        expired = (
+            select(RefreshTokenModel.id)
+            .where(RefreshTokenModel.expires_at <= utcnow())
+            .limit(PURGE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        statement = delete(RefreshTokenModel).where(RefreshTokenModel.id.in_(expired))
+        await self.session.execute(statement)
+
+    async def rotate(self, token: str) -> tuple[Principal, str] | None:
+        token_hash = hash_refresh_token(token)
+        now = utcnow()
+        statement = (
+            update(RefreshTokenModel)
+            .where(
+                RefreshTokenModel.token_hash == token_hash,
+                RefreshTokenModel.user_id == UserModel.id,
+                RefreshTokenModel.used_at.is_(None),
+                RefreshTokenModel.revoked_at.is_(None),
+                RefreshTokenModel.expires_at > now,
+            )
+            .values(used_at=now)
+            .returning(RefreshTokenModel.family_id, UserModel.id, UserModel.username)
+        )
+        row = (await self.session.execute(statement)).one_or_none()
+        if row is None:
+            statement = select(RefreshTokenModel.family_id).where(
+                RefreshTokenModel.token_hash == token_hash,
+                RefreshTokenModel.used_at.is_not(None),
+            )
+            family_id = await self.session.scalar(statement)
+            if family_id is not None:
+                await self.revoke_family(family_id)
+            return None
+        new_token = await self.issue(row.id, row.family_id)
+        return Principal(id=row.id, username=row.username), new_token
+
+    async def revoke(self, token: str) -> None:
+        statement = select(RefreshTokenModel.family_id).where(
+            RefreshTokenModel.token_hash == hash_refresh_token(token)
+        )
+        family_id = await self.session.scalar(statement)
+        if family_id is not None:
+            await self.revoke_family(family_id)
+
+    async def revoke_family(self, family_id: str) -> None:
+        statement = (
+            update(RefreshTokenModel)
+            .where(
+                RefreshTokenModel.family_id == family_id,
+                RefreshTokenModel.revoked_at.is_(None),
+            )
+            .values(revoked_at=utcnow())
+        )
+        await self.session.execute(statement)
+        await self.session.commit()
+
+
+def refresh_token_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_async_session),
+    ],
+) -> RefreshTokenCRUD:
+    return RefreshTokenCRUD(session)
@@ -5,81 +5,266 @@ Update
 Delete
 """
 
+from collections.abc import AsyncIterator
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import Depends
-from sqlalchemy import select, update, delete
+from sqlalchemy import event, select, update, delete, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.security import get_password_hash
-from .schemas import UserRead, User as UserSchema, default_user
-from models import User as UserModel
+from config import settings
+from core.cache import LRUCache
+from core.invalidation import cache_invalidator
+from core.security import (
+    get_password_hash_async,
+    get_password_hashes_async,
+    verify_password_async,
+)
+from .schemas import UserRead, UserAuth, UserUpdate, User as UserSchema, default_user
+from ..profiles.schemas import Profile, ProfileRead
+from models import User as UserModel, Profile as ProfileModel
 
-from ..get_session import get_async_session
+from ..get_session import get_async_session, get_read_session, primary_if_written
+from ..profiles.crud import PROFILE_READ_COLUMNS, profile_params
+
+# Колонки, из которых собирается UserRead
+USER_READ_COLUMNS = (UserModel.username, UserModel.email)
+
+# Пользователи по id, общий на воркер; сбрасывается через cache_invalidator
+user_cache = cache_invalidator.register(
+    "users", LRUCache(settings.api.user_cache_size, ttl=settings.api.user_cache_ttl)
+)
+
+
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def notify_user_changed(mapper, connection, target):
+    """Изменения через ORM (админка) тоже сбрасывают кэши во всех воркерах"""
+    connection.execute(cache_invalidator.notify_statement("users", target.id))
 
 
 class UsersCRUD:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create(self, user_in: UserSchema) -> UserRead:
+    async def create(
+        self, user_in: UserSchema, profile_in: ProfileRead
+    ) -> tuple[UserRead, Profile]:
+        """Пользователь и его профиль создаются в одной транзакции"""
         params = user_in.model_dump()
-        params["password_hash"] = get_password_hash(params.pop("password"))
-        user = UserModel(**params)
-        self.session.add(user)
-        user_out = user.get_schemas
+        params["password_hash"] = await get_password_hash_async(params.pop("password"))
+        statement = (
+            insert(UserModel)
+            .values(**params)
+            .returning(UserModel.id, *USER_READ_COLUMNS)
+        )
+        user = (await self.session.execute(statement)).one()
+        params = profile_params(profile_in)
+        statement = (
+            insert(ProfileModel)
+            .values(user_id=user.id, **params)
+            .returning(*PROFILE_READ_COLUMNS)
+        )
+        profile = (await self.session.execute(statement)).one()
+        await self.session.commit()
+        return {"username": user.username, "email": user.email}, profile._asdict()
+
+    async def create_many(
+        self, users_in: list[tuple[UserSchema, ProfileRead]]
+    ) -> list[bool]:
+        """
+        Массовое создание пользователей с профилями: по одному multi-row INSERT
+        на пачку. Строки с уже занятым логином или почтой (в том числе повторы
+        внутри пачки) пропускаются. Возвращает признак создания для каждой строки.
+        """
+        usernames, emails, unique = set(), set(), []
+        for i, (user_in, _) in enumerate(users_in):
+            if user_in.username not in usernames and user_in.email not in emails:
+                usernames.add(user_in.username)
+                emails.add(user_in.email)
+                unique.append(i)
+        if not unique:
+            return [False] * len(users_in)
+        hashes = await get_password_hashes_async(
+            [users_in[i][0].password for i in unique]
+        )
+        rows = [
+            {
+                "username": users_in[i][0].username,
+                "email": users_in[i][0].email,
+                "password_hash": password_hash,
+            }
+            for i, password_hash in zip(unique, hashes)
+        ]
+        statement = (
+            pg_insert(UserModel)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(UserModel.username, UserModel.id)
+        )
+        created = dict((await self.session.execute(statement)).all())
+        created_rows = [i for i in unique if users_in[i][0].username in created]
+        if created_rows:
+            profiles = [
+                {
+                    "user_id": created[users_in[i][0].username],
+                    **profile_params(users_in[i][1]),
+                }
+                for i in created_rows
+            ]
+            await self.session.execute(insert(ProfileModel).values(profiles))
         await self.session.commit()
-        return user_out
+        created_rows = set(created_rows)
+        return [i in created_rows for i in range(len(users_in))]
 
-    async def update(self, current_user: str, user_in: UserSchema) -> UserRead:
+    async def update(self, user_id: int, user_in: UserSchema) -> UserRead:
         params = user_in.model_dump()
         default_params = default_user.model_dump()
         params = {k: w for k, w in params.items() if default_params[k] != w}
         if params.get("password"):
-            params["password_hash"] = get_password_hash(params.pop("password"))
+            password = params.pop("password")
+            params["password_hash"] = await get_password_hash_async(password)
         statement = (
-            update(UserModel).where(UserModel.username == current_user).values(**params)
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(**params)
+            .returning(*USER_READ_COLUMNS, UserModel.updated_at)
         )
-        await self.session.execute(statement)
+        user = (await self.session.execute(statement)).one()
+        await cache_invalidator.notify(self.session, "users", user_id)
         await self.session.commit()
-        username_new = params.get("username")
-        current_user = username_new if username_new else current_user
-        user_out = await self.get_by_name(current_user)
-        return user_out
-
-    async def delete(self, current_user: str) -> UserRead:
-        statement = delete(UserModel).where(UserModel.username == current_user)
-        user_out = await self.get_by_name(current_user)
-        await self.session.execute(statement)
+        cache_invalidator.evict("users", user_id)
+        return user._asdict()
+
+    async def patch(self, user_id: int, user_in: UserUpdate) -> UserRead:
+        """
+        Изменяются только переданные поля, отличающиеся от текущих значений.
+        Если менять нечего, запись в БД не выполняется.
+        Пароль хэшируется, только если он действительно другой.
+        """
+        changes = user_in.model_dump(exclude_unset=True, exclude_none=True)
+        statement = select(
+            *USER_READ_COLUMNS, UserModel.updated_at, UserModel.password_hash
+        ).where(UserModel.id == user_id)
+        current = (await self.session.execute(statement)).one()
+        password = changes.pop("password", None)
+        params = {k: w for k, w in changes.items() if getattr(current, k) != w}
+        if password is not None and not (
+            current.password_hash
+            and await verify_password_async(password, current.password_hash)
+        ):
+            params["password_hash"] = await get_password_hash_async(password)
+        if not params:
+            return {
+                "username": current.username,
+                "email": current.email,
+                "updated_at": current.updated_at,
+            }
+        statement = (
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(**params)
+            .returning(*USER_READ_COLUMNS, UserModel.updated_at)
+        )
+        user = (await self.session.execute(statement)).one()
+        await cache_invalidator.notify(self.session, "users", user_id)
         await self.session.commit()
-        return user_out
-
-    async def get_by_name(self, username: str) -> UserRead:
-        statement = select(UserModel).where(UserModel.username == username)
-        user = await self.session.scalars(statement)
-        user_out = user.one().get_schemas
-        return user_out
-
-    async def get_id_by_name(self, username: str) -> int:
-        statement = select(UserModel).where(UserModel.username == username)
-        user = await self.session.scalars(statement)
-        user_id = user.one().id
-        return user_id
-
-    async def get_users_and_password(self) -> list:
-        users_list = []
-        statement = select(UserModel).order_by(UserModel.id)
-        users = await self.session.scalars(statement)
-        for user in users.all():
-            users_list.append(user.get_username_password)
-        return users_list
-
-    async def get(self) -> list:
-        users_list = []
-        statement = select(UserModel).order_by(UserModel.id)
-        users = await self.session.scalars(statement)
-        for user in users:
-            users_list.append(user.get_schemas)
-        return users_list
+        cache_invalidator.evict("users", user_id)
+        return user._asdict()
+
+    async def delete(self, user_id: int) -> UserRead:
+        statement = (
+            delete(UserModel)
+            .where(UserModel.id == user_id)
+            .returning(*USER_READ_COLUMNS)
+        )
+        user = (await self.session.execute(statement)).one()
+        await cache_invalidator.notify(self.session, "users", user_id)
+        await self.session.commit()
+        cache_invalidator.evict("users", user_id)
+        return user._asdict()
+
+    async def get_by_id(self, user_id: int) -> UserRead:
+        """Чтение через user_cache, промах дочитывается из БД и кэшируется"""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        generation = cache_invalidator.generation
+        statement = select(*USER_READ_COLUMNS, UserModel.updated_at).where(
+            UserModel.id == user_id
+        )
+        result = await self.session.execute(
+            statement, bind_arguments=primary_if_written(user_id)
+        )
+        user = result.one()._asdict()
+        cache_invalidator.fill(user_cache, user_id, user, generation)
+        return user
+
+    async def get_version(self, user_id: int) -> datetime:
+        """Время последнего изменения записи, по нему строится ETag"""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user["updated_at"]
+        statement = select(UserModel.updated_at).where(UserModel.id == user_id)
+        return (await self.session.execute(statement)).scalar_one()
+
+    async def lock_version(self, user_id: int) -> datetime:
+        """
+        То же, что get_version, но строка блокируется до конца транзакции,
+        чтобы проверка If-Match и следующее изменение были атомарны
+        """
+        statement = (
+            select(UserModel.updated_at)
+            .where(UserModel.id == user_id)
+            .with_for_update()
+        )
+        return (await self.session.execute(statement)).scalar_one()
+
+    async def get_auth_by_name(self, username: str) -> UserAuth | None:
+        statement = select(
+            UserModel.id, UserModel.username, UserModel.password_hash
+        ).where(UserModel.username == username)
+        user = (await self.session.execute(statement)).one_or_none()
+        if user is None or user.password_hash is None:
+            return None
+        return UserAuth(
+            id=user.id, username=user.username, password_hash=user.password_hash
+        )
+
+    async def is_admin(self, user_id: int) -> bool:
+        """Права проверяются по БД, чтобы их снятие действовало сразу"""
+        statement = select(UserModel.is_admin).where(UserModel.id == user_id)
+        return bool((await self.session.execute(statement)).scalar_one_or_none())
+
+    async def get(self, after_id: int | None, limit: int) -> tuple[list, int | None]:
+        """
+        Страница записей по возрастанию id, начиная после after_id.
+        Выбираются только нужные колонки, ORM-объекты не создаются.
+        """
+        statement = (
+            select(UserModel.id, *USER_READ_COLUMNS)
+            .order_by(UserModel.id)
+            .limit(limit + 1)
+        )
+        if after_id is not None:
+            statement = statement.where(UserModel.id > after_id)
+        users = (await self.session.execute(statement)).all()
+        last_id = users[limit - 1].id if len(users) > limit else None
+        return [
+            {"username": user.username, "email": user.email} for user in users[:limit]
+        ], last_id
+
+    async def stream(self, batch_size: int) -> AsyncIterator[list[dict]]:
+        """Выгрузка всей таблицы серверным курсором, пачками по batch_size строк"""
+        statement = (
+            select(UserModel.id, UserModel.username, UserModel.email)
+            .order_by(UserModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(statement)
+        async for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
 
 
 def users_crud(
@@ -89,3 +274,13 @@ def users_crud(
     ],
 ) -> UsersCRUD:
     return UsersCRUD(session)
+
+
+def users_read_crud(
+    session: Annotated[
+        AsyncSession,
+        Depends(get_read_session),
+    ],
+) -> UsersCRUD:
+    """CRUD на сессии для чтения, для маршрутов без записи"""
+    return UsersCRUD(session)
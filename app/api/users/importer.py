@@ -0,0 +1,129 @@
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError, InterfaceError
+
+from .crud import UsersCRUD
+from .schemas import User as UserSchema
+from ..profiles.schemas import ProfileRead
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+ImportFormat = Literal["ndjson", "csv"]
+
+
+async def read_lines(request: Request) -> AsyncIterator[str]:
+    """Строки тела запроса по мере его получения, без чтения всего тела в память"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    async for chunk in request.stream():
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def read_records(
+    request: Request, import_format: ImportFormat
+) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Записи импорта с номерами строк. Вместо записи отдается текст ошибки,
+    если строку не удалось разобрать. CSV должен начинаться со строки заголовка,
+    значения с переводом строки внутри не поддерживаются.
+    """
+    header = None
+    line_no = 0
+    async for line in read_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        if import_format == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, "Invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, "Expected a JSON object"
+                continue
+            yield line_no, record
+        elif header is None:
+            header = next(csv.reader([line]))
+        else:
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                yield line_no, "Wrong number of columns"
+                continue
+            yield line_no, dict(zip(header, values))
+
+
+def validate_record(record: dict) -> tuple[UserSchema, ProfileRead]:
+    """Проверка записи теми же схемами, что и при обычной регистрации"""
+    user_in = UserSchema.model_validate(record)
+    profile_fields = ProfileRead.model_fields.keys()
+    profile_in = ProfileRead.model_validate(
+        {k: w for k, w in record.items() if k in profile_fields}
+    )
+    return user_in, profile_in
+
+
+def format_errors(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+    )
+
+
+class ImportReport:
+    """Итог импорта: сколько создано и ошибки по строкам (первые MAX_REPORTED_ERRORS)"""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def error(self, line_no: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "detail": detail})
+
+    def as_dict(self) -> dict:
+        errors = sorted(self.errors, key=lambda error: error["line"])
+        return {"created": self.created, "failed": self.failed, "errors": errors}
+
+
+async def import_batch(
+    crud: UsersCRUD,
+    batch: list[tuple[int, tuple[UserSchema, ProfileRead]]],
+    report: ImportReport,
+) -> None:
+    """
+    Создание пачки одной транзакцией. Если БД отклонила пачку, транзакция
+    откатывается, а все ее строки попадают в отчет; импорт продолжается
+    со следующей пачки. Потеря соединения прерывает импорт целиком.
+    """
+    if not batch:
+        return
+    try:
+        created = await crud.create_many([users_in for _, users_in in batch])
+    except InterfaceError:
+        raise
+    except DBAPIError as exc:
+        await crud.session.rollback()
+        detail = f"Batch rejected by database: {exc.orig}"
+        for line_no, _ in batch:
+            report.error(line_no, detail)
+        return
+    for (line_no, _), is_created in zip(batch, created):
+        if is_created:
+            report.created += 1
+        else:
+            report.error(line_no, "User already exists")
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, EmailStr
 from typing import Annotated, Optional
 
+from ..profiles.schemas import ProfileOut
+
 
 class UserRead(BaseModel):
     username: Annotated[
@@ -11,7 +13,10 @@ class UserRead(BaseModel):
             description="Логин пользователя, от 3 до 15 символов",
         ),
     ]
-    email: Annotated[EmailStr, Field(description="Электронная почта пользователя")]
+    email: Annotated[
+        EmailStr,
+        Field(max_length=30, description="Электронная почта пользователя, до 30 символов"),
+    ]
 
 
 class User(UserRead):
@@ -25,7 +30,67 @@ class User(UserRead):
     ]
 
 
+class UserUpdate(BaseModel):
+    """Частичное изменение пользователя: учитываются только переданные поля"""
+    username: Annotated[
+        Optional[str],
+        Field(
+            min_length=3,
+            max_length=15,
+            description="Логин пользователя, от 3 до 15 символов",
+        ),
+    ] = None
+    email: Annotated[
+        Optional[EmailStr],
+        Field(max_length=30, description="Электронная почта пользователя, до 30 символов"),
+    ] = None
+    password: Annotated[
+        Optional[str],
+        Field(
+            min_length=8,
+            max_length=20,
+            description="Пароль пользователя, от 8 до 20 символов",
+        ),
+    ] = None
+
+
+class UserInfo(BaseModel):
+    """Ответ с информацией о пользователе"""
+    description: str
+    user_info: Annotated[UserRead, Field(alias="user info")]
+
+
+class UserUpdated(UserInfo):
+    """Ответ на изменение пользователя, при смене логина содержит новый токен"""
+    access_token: str | None = None
+    token_type: str | None = None
+
+
+class UserCreated(UserInfo):
+    """Ответ на создание пользователя вместе с профилем"""
+    profile: ProfileOut
+
+
+class UserDeleted(BaseModel):
+    """Ответ на удаление пользователя"""
+    detail: str
+    user_info: Annotated[UserRead, Field(alias="user info")]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    """Отчет о массовом импорте пользователей"""
+    created: int
+    failed: int
+    errors: list[ImportRowError]
+
+
 class UserAuth(BaseModel):
+    id: Annotated[int, Field()]
     username: Annotated[str, Field()]
     password_hash: Annotated[str, Field()]
 
@@ -1,13 +1,48 @@
 from typing import Annotated
-from fastapi import APIRouter, Body, status, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from pydantic import ValidationError
 from fastapi.responses import JSONResponse
 
 from sqlalchemy.exc import NoResultFound, InterfaceError, IntegrityError
 
-from .crud import UsersCRUD, users_crud
-from .schemas import User as UserSchema, default_user
-from ..dependencies import get_current_user
-from ..profiles.crud import ProfileCRUD, profile_crud
+from .crud import UsersCRUD, users_crud, users_read_crud
+from .schemas import (
+    User as UserSchema,
+    UserCreated,
+    UserDeleted,
+    UserInfo,
+    UserRead,
+    UserUpdate,
+    UserUpdated,
+    ImportResult,
+    default_user,
+)
+from .importer import (
+    IMPORT_BATCH_SIZE,
+    ImportFormat,
+    ImportReport,
+    format_errors,
+    import_batch,
+    read_records,
+    validate_record,
+)
+from core.security import create_access_token
+from ..dependencies import get_current_admin, get_current_user
+from ..get_session import read_session
+from ..etag import etag_matches, make_etag, not_modified, precondition_failed
+from ..pagination import Page, PageParams, page_params, next_cursor
+from ..responses import FastJSONResponse
+from ..export import EXPORT_BATCH_SIZE, ExportFormat, export_response
+from ..token import Principal
 from ..profiles.schemas import ProfileRead, default_profile
 
 router = APIRouter(tags=["Users"], prefix="/api/users")
@@ -16,6 +51,7 @@ router = APIRouter(tags=["Users"], prefix="/api/users")
 @router.post(
     "",
     status_code=status.HTTP_200_OK,
+    response_model=UserCreated,
     summary="Create user",
     responses={
         status.HTTP_200_OK: {
@@ -28,6 +64,11 @@ router = APIRouter(tags=["Users"], prefix="/api/users")
                             "username": "string",
                             "email": "user@example.com",
                         },
+                        "profile": {
+                            "first_name": "string",
+                            "last_name": "string",
+                            "phone": "+71234567890",
+                        },
                     }
                 }
             },
@@ -39,18 +80,15 @@ router = APIRouter(tags=["Users"], prefix="/api/users")
     },
 )
 async def set_user(
-    crud_user: Annotated[UsersCRUD, Depends(users_crud)],
-    crud_profile: Annotated[ProfileCRUD, Depends(profile_crud)],
+    crud: Annotated[UsersCRUD, Depends(users_crud)],
     user_in: Annotated[UserSchema, Body()] = default_user,
     profile_in: Annotated[ProfileRead, Body()] = default_profile ,
 ):
     """
-    Создание нового пользователя
+    Создание нового пользователя вместе с профилем
     """
     try:
-        user = await crud_user.create(user_in)
-        user_id = await crud_user.get_id_by_name(user_in.username)
-        profile = await crud_profile.create(profile_in = profile_in, user_id=user_id)
+        user, profile = await crud.create(user_in, profile_in)
     except InterfaceError:
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,9 +106,69 @@ async def set_user(
     }
 
 
+@router.post(
+    "/import",
+    status_code=status.HTTP_200_OK,
+    response_model=ImportResult,
+    summary="Bulk import users",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Import report",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "created": 2,
+                        "failed": 1,
+                        "errors": [{"line": 3, "detail": "User already exists"}],
+                    }
+                }
+            },
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def import_users(
+    current_user: Annotated[Principal, Depends(get_current_admin)],
+    request: Request,
+    crud: Annotated[UsersCRUD, Depends(users_crud)],
+    import_format: Annotated[ImportFormat, Query(alias="format")] = "ndjson",
+):
+    """
+    Этот маршрут доступен только администраторам.
+    Массовое создание пользователей с профилями из тела запроса в NDJSON или CSV.
+    Поля строки: username, email, password, first_name, last_name, phone.
+    Ошибочные строки попадают в отчет и не прерывают импорт остальных.
+    """
+    report = ImportReport()
+    batch = []
+    try:
+        async for line_no, record in read_records(request, import_format):
+            if isinstance(record, str):
+                report.error(line_no, record)
+                continue
+            try:
+                batch.append((line_no, validate_record(record)))
+            except ValidationError as exc:
+                report.error(line_no, format_errors(exc))
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await import_batch(crud, batch, report)
+                batch = []
+        await import_batch(crud, batch, report)
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    return report.as_dict()
+
+
 @router.get(
     "/me",
     status_code=status.HTTP_200_OK,
+    response_model=UserInfo,
     summary="Get user info",
     responses={
         status.HTTP_200_OK: {
@@ -96,14 +194,21 @@ async def set_user(
     },
 )
 async def about_me(
-    current_user: Annotated[str, Depends(get_current_user)],
-    crud: Annotated[UsersCRUD, Depends(users_crud)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[UsersCRUD, Depends(users_read_crud)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Этот маршрут защищен и требует токен. Если токен действителен, мы возвращаем информацию о пользователе.
+    Если ETag из If-None-Match совпадает с текущим, возвращается 304 без тела.
     """
     try:
-        user = await crud.get_by_name(current_user)
+        if if_none_match is not None:
+            etag = make_etag(current_user.id, await crud.get_version(current_user.id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        user = await crud.get_by_id(current_user.id)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -113,6 +218,7 @@ async def about_me(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
+    response.headers["ETag"] = make_etag(current_user.id, user["updated_at"])
     return {
         "description": "User info",
         "user info": user,
@@ -122,6 +228,8 @@ async def about_me(
 @router.put(
     "/me",
     status_code=status.HTTP_200_OK,
+    response_model=UserUpdated,
+    response_model_exclude_none=True,
     summary="Update user",
     responses={
         status.HTTP_200_OK: {
@@ -134,6 +242,8 @@ async def about_me(
                             "username": "string",
                             "email": "user@example.com",
                         },
+                        "access_token": "token",
+                        "token_type": "bearer",
                     }
                 }
             },
@@ -147,15 +257,23 @@ async def about_me(
     },
 )
 async def update_user_info(
-    current_user: Annotated[str, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     crud: Annotated[UsersCRUD, Depends(users_crud)],
+    response: Response,
     user_in: Annotated[UserSchema, Body()] = default_user,
+    if_match: Annotated[str | None, Header()] = None,
 ):
     """
     Этот маршрут защищен и требует токен. Если токен действителен, мы можем изменить информацию о пользователе.
+    При смене логина выдается новый токен доступа.
+    С заголовком If-Match изменение выполняется, только если ETag не изменился.
     """
     try:
-        user = await crud.update(current_user, user_in)
+        if if_match is not None:
+            etag = make_etag(current_user.id, await crud.lock_version(current_user.id))
+            if not etag_matches(if_match, etag):
+                return precondition_failed()
+        user = await crud.update(current_user.id, user_in)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -165,15 +283,99 @@ async def update_user_info(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
-    return {
+    response.headers["ETag"] = make_etag(current_user.id, user["updated_at"])
+    result = {
         "description": "User updated",
         "user info": user,
     }
+    if user["username"] != current_user.username:
+        token = create_access_token(current_user.id, user["username"])
+        result["access_token"] = token
+        result["token_type"] = "bearer"
+    return result
+
+
+@router.patch(
+    "/me",
+    status_code=status.HTTP_200_OK,
+    response_model=UserUpdated,
+    response_model_exclude_none=True,
+    summary="Partially update user",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "User updated",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "User updated",
+                        "user info": {
+                            "username": "string",
+                            "email": "user@example.com",
+                        },
+                        "access_token": "token",
+                        "token_type": "bearer",
+                    }
+                }
+            },
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "User not found",
+        },
+        status.HTTP_409_CONFLICT: {"description": "User already exists"},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Server Error",
+        },
+    },
+)
+async def patch_user_info(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    crud: Annotated[UsersCRUD, Depends(users_crud)],
+    response: Response,
+    user_in: Annotated[UserUpdate, Body()],
+    if_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Этот маршрут защищен и требует токен. Изменяются только переданные поля.
+    Если ничего не изменилось, запись в БД не выполняется.
+    При смене логина выдается новый токен доступа.
+    С заголовком If-Match изменение выполняется, только если ETag не изменился.
+    """
+    try:
+        if if_match is not None:
+            etag = make_etag(current_user.id, await crud.lock_version(current_user.id))
+            if not etag_matches(if_match, etag):
+                return precondition_failed()
+        user = await crud.patch(current_user.id, user_in)
+    except NoResultFound:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
+        )
+    except InterfaceError:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Server Error"},
+        )
+    except IntegrityError:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": "User already exists"},
+        )
+    response.headers["ETag"] = make_etag(current_user.id, user["updated_at"])
+    result = {
+        "description": "User updated",
+        "user info": user,
+    }
+    if user["username"] != current_user.username:
+        token = create_access_token(current_user.id, user["username"])
+        result["access_token"] = token
+        result["token_type"] = "bearer"
+    return result
 
 
 @router.delete(
     "/me",
     status_code=status.HTTP_200_OK,
+    response_model=UserDeleted,
     summary="Delete user",
     responses={
         status.HTTP_200_OK: {
@@ -199,14 +401,14 @@ async def update_user_info(
     },
 )
 async def del_user(
-    current_user: Annotated[str, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     crud: Annotated[UsersCRUD, Depends(users_crud)],
 ):
     """
     Этот маршрут защищен и требует токен. Если токен действителен, мы можем удалить пользователя.
     """
     try:
-        user = await crud.delete(current_user)
+        user = await crud.delete(current_user.id)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -216,26 +418,26 @@ async def del_user(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
-    return JSONResponse(
-        content={
-            "detail": "User deleted",
-            "user info": user,
-        }
-    )
+    return {
+        "detail": "User deleted",
+        "user info": user,
+    }
 
 
 @router.get(
     "/all_users",
     status_code=status.HTTP_200_OK,
+    response_model=Page[UserRead],
 )
 async def all_users(
-    crud: Annotated[UsersCRUD, Depends(users_crud)],
+    page: Annotated[PageParams, Depends(page_params)],
+    crud: Annotated[UsersCRUD, Depends(users_read_crud)],
 ):
     """
-    Этот маршрут защищен и требует токен. Если токен действителен, мы возвращаем информацию о пользователе.
+    Постраничный список. Для следующей страницы передайте next_cursor в параметре cursor.
     """
     try:
-        users = await crud.get()
+        users, last_id = await crud.get(page.after_id, page.limit)
     except NoResultFound:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND, content={"detail": "User not found"}
@@ -245,4 +447,35 @@ async def all_users(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Server Error"},
         )
-    return users
+    # Ответ собирается сразу, без повторной валидации каждой строки через response_model
+    return FastJSONResponse(
+        {
+            "items": users,
+            "next_cursor": next_cursor(last_id),
+        }
+    )
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Export users",
+)
+async def export_users(
+    current_user: Annotated[Principal, Depends(get_current_admin)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+):
+    """
+    Этот маршрут доступен только администраторам.
+    Потоковая выгрузка всех пользователей в NDJSON или CSV.
+    """
+
+    async def batches():
+        # Сессия открывается внутри генератора: она должна жить, пока отправляется ответ
+        async with read_session() as session:
+            async for rows in UsersCRUD(session).stream(EXPORT_BATCH_SIZE):
+                yield rows
+
+    return export_response(
+        batches(), ["id", "username", "email"], export_format, "users"
+    )
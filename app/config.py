@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +16,61 @@ class ApiConfig(BaseModel):
     """
     secret_key: str
 
+    revocation_backend: Literal["memory", "postgres"] = "memory"
+    """Where revoked token ids are kept; use postgres with several workers"""
+
+    revocation_sync_interval: float = 1.0
+    """Seconds between rebuilds of the local revoked-token filter; with the postgres
+    backend revocations from other workers arrive sooner, via cache_channel"""
+
+    token_cache_size: int = 10000
+    """Max number of verified tokens cached per worker"""
+
+    page_size: int = 50
+    """Default page size of list endpoints"""
+
+    max_page_size: int = 500
+    """Upper bound for the limit query parameter of list endpoints"""
+
+    user_cache_size: int = 10000
+    """Max number of users and of profiles cached per worker"""
+
+    user_cache_ttl: float = 300.0
+    """Seconds a cached user or profile lives even if no invalidation arrives"""
+
+    cache_channel: str = "cache_invalidation"
+    """Postgres NOTIFY channel that drops cached records in all workers"""
+
+    catalog_cache_size: int = 1000
+    """Max number of product catalog pages, and of products, cached per worker"""
+
+    catalog_cache_ttl: float = 60.0
+    """Seconds a cached catalog page or product lives without invalidation"""
+
+
+class HashPoolConfig(BaseModel):
+    """
+    Setting for the password hashing process pool
+    """
+    workers: int = 2
+    """Number of worker processes"""
+
+    max_pending: int = 64
+    """Max hashing jobs queued or running at once per app worker"""
+
+    wait_timeout: float = 5.0
+    """Seconds to wait for a free slot before rejecting with 503"""
+
+    bulk_workers: int = 1
+    """Max processes busy with bulk hashing (imports) at once; the rest serve logins.
+    Import rate per app worker is about bulk_workers * 60 / (seconds per bcrypt hash)
+    users a minute, ~180 per process at cost 12; 10k signups/min needs ~55 processes
+    across all app workers, so raise workers and bulk_workers together"""
+
+    bulk_chunk_size: int = 8
+    """Passwords hashed per bulk job; a login waits for at most one such job"""
+
+
 class AdminConfig(BaseModel):
     """
     Setting for the AdminPanel
@@ -41,6 +97,48 @@ class DatabaseConfig(BaseModel):
     pool_size: int = 50
     max_overflow: int = 0
 
+    pool_sizing: Literal["fixed", "budget"] = "fixed"
+    """fixed: use pool_size as is; budget: split connection_budget between workers"""
+
+    connection_budget: int = 20
+    """Connections all app workers may hold together in budget mode: each worker's
+    pool plus its LISTEN connection. Migrations, admin scripts, replica pools and other
+    direct_host clients are not counted; keep max_connections above the budget for them"""
+
+    workers: int = 1
+    """Number of app worker processes sharing connection_budget"""
+
+    pool_timeout: float = 30.0
+    """Seconds to wait for a free connection before failing the request"""
+
+    pool_pre_ping: bool = False
+    """Test connections on checkout and silently replace dead ones"""
+
+    pool_recycle: int = -1
+    """Reopen connections older than this many seconds; -1 keeps them forever"""
+
+    pgbouncer: bool = False
+    """host is PgBouncer in transaction pooling mode: no prepared statement caching"""
+
+    direct_host: str | None = None
+    """Postgres host bypassing PgBouncer, for LISTEN and migrations; defaults to host"""
+
+    direct_port: int | None = None
+    """Postgres port bypassing PgBouncer; defaults to port"""
+
+    replica_urls: list[str] = []
+    """SQLAlchemy URLs (postgresql+asyncpg://...) of read replicas"""
+
+    replica_max_lag: float = 5.0
+    """Seconds of replication lag after which a replica stops getting reads"""
+
+    replica_check_interval: float = 1.0
+    """Seconds between replica lag checks"""
+
+    read_your_writes_window: float = 10.0
+    """Seconds after a user's write during which their reads go to the primary;
+    keep it above replica_max_lag"""
+
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
         "uq": "uq_%(table_name)s_%(column_0_N_name)s",
@@ -49,9 +147,11 @@ class DatabaseConfig(BaseModel):
         "pk": "pk_%(table_name)s",
     }
 
-    def create_pg_url(self, engine: str) -> str:
+    def create_pg_url(
+        self, engine: str, host: str | None = None, port: int | None = None
+    ) -> str:
         dsn = PostgresDsn(
-            f"postgresql+{engine}://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+            f"postgresql+{engine}://{self.user}:{self.password}@{host or self.host}:{port or self.port}/{self.name}"
         )
         return dsn.encoded_string()
 
@@ -59,6 +159,24 @@ class DatabaseConfig(BaseModel):
     def async_url(self) -> str:
         return self.create_pg_url(SQLA_PG_ASYNC_ENGINE)
 
+    @property
+    def direct_url(self) -> str:
+        """URL of Postgres itself, bypassing PgBouncer"""
+        return self.create_pg_url(
+            SQLA_PG_ASYNC_ENGINE, self.direct_host, self.direct_port
+        )
+
+    @property
+    def effective_pool_size(self) -> int:
+        """
+        Размер пула одного воркера. В режиме budget из доли воркера
+        вычитается соединение LISTEN для сброса кэшей. Соединения миграций
+        и других клиентов direct_host в бюджет не входят
+        """
+        if self.pool_sizing == "budget":
+            return max(1, self.connection_budget // self.workers - 1)
+        return self.pool_size
+
 
 class Settings(BaseSettings):
 
@@ -76,6 +194,7 @@ class Settings(BaseSettings):
     db: DatabaseConfig
     admin: AdminConfig
     api: ApiConfig
+    hash_pool: HashPoolConfig = HashPoolConfig()
 
 
 # noinspection PyArgumentList
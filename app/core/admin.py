@@ -41,7 +41,10 @@ class AddressAdmin(ModelView, model=Address):
 
 
 class ProductAdmin(ModelView, model=Product):
-    column_list = Product.get_columns()
+    column_list = [
+        column for column in Product.get_columns() if column != "search_vector"
+    ]
+    form_excluded_columns = [Product.search_vector]
 
 
 class OrderItemAdmin(ModelView, model=OrderItem):
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Callable, Hashable
+
+import asyncpg
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidator:
+    """
+    Сброс записей локальных кэшей во всех воркерах через LISTEN/NOTIFY.
+    Пишущий код отправляет уведомление в своей транзакции (Postgres доставит
+    его только после commit) и сразу после commit сбрасывает запись у себя.
+    Остальные воркеры получают уведомление по отдельному соединению.
+    Пока соединения нет, кэши не заполняются, а при его потере очищаются:
+    пропущенные уведомления восстановить нельзя.
+    """
+
+    def __init__(self, channel: str, reconnect_interval: float = 1.0):
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.caches: dict[str, list[LRUCache]] = defaultdict(list)
+        self.subscribers: dict[str, list[Callable[[Hashable], None]]] = defaultdict(
+            list
+        )
+        self.generation = 0
+        self.received = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.connected = False
+        self._connection: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, namespace: str, cache: LRUCache) -> LRUCache:
+        """Кэш, записи которого сбрасываются по ключам из namespace"""
+        self.caches[namespace].append(cache)
+        return cache
+
+    def subscribe(self, namespace: str, callback: Callable[[Hashable], None]) -> None:
+        """callback вызывается с ключом каждой сброшенной записи из namespace"""
+        self.subscribers[namespace].append(callback)
+
+    def notify_statement(self, namespace: str, key: Hashable) -> Select:
+        payload = json.dumps(
+            {"ns": namespace, "key": key, "ts": time.time(), "pid": os.getpid()}
+        )
+        return select(func.pg_notify(self.channel, payload))
+
+    async def notify(
+        self, session: AsyncSession, namespace: str, key: Hashable
+    ) -> None:
+        await session.execute(self.notify_statement(namespace, key))
+
+    def evict(self, namespace: str, key: Hashable) -> None:
+        self.generation += 1
+        for cache in self.caches[namespace]:
+            cache.pop(key)
+        for callback in self.subscribers[namespace]:
+            callback(key)
+
+    def fill(self, cache: LRUCache, key: Hashable, value, generation: int) -> None:
+        """
+        Кладет в кэш значение, прочитанное из БД. Если за время чтения был
+        сброс (generation изменился), значение могло устареть и не кэшируется.
+        """
+        if self.connected and generation == self.generation:
+            cache.set(key, value)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        message = json.loads(payload)
+        self.evict(message["ns"], message["key"])
+        self.received += 1
+        self.last_lag = max(time.time() - message["ts"], 0.0)
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+    def _on_terminate(self, connection) -> None:
+        self._connection = None
+        self._disconnected()
+
+    def _disconnected(self) -> None:
+        self.connected = False
+        self.generation += 1
+        for caches in self.caches.values():
+            for cache in caches:
+                cache.clear()
+
+    async def _listen_forever(self) -> None:
+        while True:
+            if self._connection is None:
+                try:
+                    # LISTEN не работает через PgBouncer в режиме transaction
+                    connection = await asyncpg.connect(
+                        host=settings.db.direct_host or settings.db.host,
+                        port=settings.db.direct_port or settings.db.port,
+                        user=settings.db.user,
+                        password=settings.db.password,
+                        database=settings.db.name,
+                    )
+                    connection.add_termination_listener(self._on_terminate)
+                    await connection.add_listener(self.channel, self._on_notify)
+                    self._connection = connection
+                    self.connected = True
+                except (OSError, asyncpg.PostgresError):
+                    logger.exception("Cache invalidation listener failed to connect")
+            await asyncio.sleep(self.reconnect_interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            connection.remove_termination_listener(self._on_terminate)
+            await connection.close()
+        self._disconnected()
+
+    @property
+    def stats(self) -> dict[str, int | float | bool]:
+        """last_lag и max_lag: секунды от отправки уведомления до сброса записи"""
+        return {
+            "connected": self.connected,
+            "received": self.received,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+
+cache_invalidator = CacheInvalidator(channel=settings.api.cache_channel)
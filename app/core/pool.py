@@ -0,0 +1,95 @@
+import bisect
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+# Верхние границы корзин гистограммы ожидания соединения, секунды
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """
+    Счетчики пула соединений одного движка: сколько ждали соединение,
+    сколько раз не дождались и как давно открыты текущие соединения
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._connected_at: dict[int, float] = {}
+
+    def observe_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_sum += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Подписка на события пула: время открытия и закрытия соединений"""
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self._connected_at[id(connection_record)] = time.monotonic()
+
+        @event.listens_for(engine.sync_engine, "close")
+        def on_close(dbapi_connection, connection_record):
+            self._connected_at.pop(id(connection_record), None)
+
+        @event.listens_for(engine.sync_engine, "detach")
+        def on_detach(dbapi_connection, connection_record):
+            self._connected_at.pop(id(connection_record), None)
+
+    def stats(self, pool: Pool) -> dict:
+        now = time.monotonic()
+        ages = [now - connected_at for connected_at in self._connected_at.values()]
+        buckets = {str(bound): 0 for bound in WAIT_BUCKETS}
+        buckets["+Inf"] = 0
+        total = 0
+        for bound, count in zip(buckets, self.wait_buckets):
+            total += count
+            buckets[bound] = total
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait": {
+                "sum": self.wait_sum,
+                "max": self.wait_max,
+                "buckets": buckets,
+            },
+            "connections": len(ages),
+            "connection_age": {
+                "max": max(ages, default=0.0),
+                "mean": sum(ages) / len(ages) if ages else 0.0,
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Очередь соединений, которая замеряет ожидание соединения и таймауты"""
+
+    def __init__(self, creator, metrics: PoolMetrics | None = None, **kw):
+        super().__init__(creator, **kw)
+        self.metrics = metrics if metrics is not None else PoolMetrics()
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
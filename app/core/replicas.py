@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Hashable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+from models.base import replica_engines
+from .invalidation import cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах; 0, если все полученные WAL уже применены
+# или сервер не является репликой
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """)
+
+
+class ReplicaRouter:
+    """
+    Выбор сервера для чтения: реплики по кругу, основной сервер, если
+    реплик нет или все отстают больше max_lag. Пользователь, недавно
+    что-то изменивший, читает с основного сервера read_your_writes секунд.
+    О записях узнаем из уведомлений cache_invalidator, поэтому окно
+    работает во всех воркерах, а не только в том, где была запись.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        read_your_writes: float,
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes = read_your_writes
+        self.lags: dict[int, float | None] = {}
+        self._healthy: list[AsyncEngine] = []
+        self._round_robin = itertools.cycle(())
+        self._recent_writes: dict[Hashable, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def mark_write(self, user_id: Hashable) -> None:
+        now = time.monotonic()
+        self._recent_writes[user_id] = now + self.read_your_writes
+        if len(self._recent_writes) > 10000:
+            self._recent_writes = {
+                key: until for key, until in self._recent_writes.items() if until > now
+            }
+
+    def written_recently(self, key: Hashable) -> bool:
+        """Была ли запись по ключу за последние read_your_writes секунд"""
+        until = self._recent_writes.get(key)
+        return until is not None and until > time.monotonic()
+
+    def engine_for_read(self, user_id: Hashable | None = None) -> AsyncEngine | None:
+        """Движок реплики для чтения или None, если читать нужно с основного"""
+        if not self._healthy:
+            return None
+        if user_id is not None and self.written_recently(user_id):
+            return None
+        return next(self._round_robin)
+
+    async def check(self) -> None:
+        healthy = []
+        for i, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as connection:
+                    lag = await connection.scalar(REPLICA_LAG_QUERY)
+            except Exception as exc:
+                if self.lags.get(i, 0.0) is not None:
+                    logger.warning(
+                        "Replica %s is unavailable: %s", engine.url.host, exc
+                    )
+                lag = None
+            else:
+                lag = float(lag or 0)
+                if lag <= self.max_lag:
+                    healthy.append(engine)
+            self.lags[i] = lag
+        if healthy != self._healthy:
+            self._healthy = healthy
+            self._round_robin = itertools.cycle(healthy)
+
+    async def _check_forever(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica lag check failed")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.engines:
+            self._task = asyncio.create_task(self._check_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._healthy = []
+        self._round_robin = itertools.cycle(())
+
+    @property
+    def stats(self) -> dict:
+        """lag: секунды отставания по каждой реплике, None - реплика недоступна"""
+        return {
+            "replicas": len(self.engines),
+            "healthy": len(self._healthy),
+            "lag": [self.lags.get(i) for i in range(len(self.engines))],
+        }
+
+
+replica_router = ReplicaRouter(
+    engines=replica_engines,
+    max_lag=settings.db.replica_max_lag,
+    check_interval=settings.db.replica_check_interval,
+    read_your_writes=settings.db.read_your_writes_window,
+)
+cache_invalidator.subscribe("users", replica_router.mark_write)
+cache_invalidator.subscribe("orders", replica_router.mark_write)
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from models import RevokedToken
+from models.base import async_session
+from .invalidation import cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Фильтр Блума по jti отозванных токенов.
+    Отвечает "точно не отозван" без обращения к хранилищу,
+    положительный ответ нужно перепроверить.
+    """
+
+    def __init__(self, size: int = 1 << 20, hashes: int = 4):
+        self.size = size
+        self.hashes = hashes
+        self._bits = bytearray(size // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 8 : (i + 1) * 8], "little") % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class MemoryRevocationBackend:
+    """Хранилище в памяти процесса, записи удаляются после истечения токена"""
+
+    shared = False
+
+    def __init__(self):
+        self._items: dict[str, int] = {}
+
+    async def add(self, jti: str, exp: int) -> None:
+        self._items[jti] = exp
+
+    async def contains(self, jti: str) -> bool:
+        exp = self._items.get(jti)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            del self._items[jti]
+            return False
+        return True
+
+    async def active(self) -> list[str]:
+        now = time.time()
+        self._items = {jti: exp for jti, exp in self._items.items() if exp > now}
+        return list(self._items)
+
+
+class PostgresRevocationBackend:
+    """
+    Хранилище в таблице revoked_tokens, общее для всех воркеров.
+    Об отзыве остальные воркеры узнают через cache_invalidator в namespace "tokens"
+    """
+
+    shared = True
+
+    @staticmethod
+    def _utc(timestamp: float) -> datetime:
+        return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+    async def add(self, jti: str, exp: int) -> None:
+        statement = (
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=self._utc(exp))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        async with async_session() as session:
+            await session.execute(statement)
+            await cache_invalidator.notify(session, "tokens", jti)
+            await session.commit()
+
+    async def contains(self, jti: str) -> bool:
+        statement = select(RevokedToken.id).where(
+            RevokedToken.jti == jti,
+            RevokedToken.expires_at > self._utc(time.time()),
+        )
+        async with async_session() as session:
+            return (await session.scalar(statement)) is not None
+
+    async def active(self) -> list[str]:
+        now = self._utc(time.time())
+        async with async_session() as session:
+            await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= now)
+            )
+            jtis = await session.scalars(
+                select(RevokedToken.jti).where(RevokedToken.expires_at > now)
+            )
+            jtis = jtis.all()
+            await session.commit()
+        return jtis
+
+
+class TokenRevocationStore:
+    """
+    Отозванные токены по jti.
+    Перед хранилищем стоит фильтр Блума, поэтому проверка неотозванного
+    токена не делает запросов. Отзыв в другом воркере попадает в фильтр
+    по NOTIFY, то есть через миллисекунды после commit, а не после
+    очередной перестройки. Пока LISTEN-соединения нет, уведомления теряются,
+    поэтому при промахе фильтра проверяется общее хранилище.
+    Фильтр периодически перестраивается из хранилища: так забываются
+    истекшие токены и подхватываются отзывы, уведомления о которых потерялись.
+    """
+
+    def __init__(self, backend, sync_interval: float):
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self._bloom = BloomFilter()
+        self._next_bloom: BloomFilter | None = None
+        self._task: asyncio.Task | None = None
+
+    async def revoke(self, jti: str, exp: int) -> None:
+        await self.backend.add(jti, exp)
+        self.remember(jti)
+
+    def remember(self, jti: str) -> None:
+        """Отметка в фильтре об отзыве, сделанном здесь или в другом воркере"""
+        self._bloom.add(jti)
+        if self._next_bloom is not None:
+            self._next_bloom.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom and (
+            cache_invalidator.connected or not self.backend.shared
+        ):
+            return False
+        return await self.backend.contains(jti)
+
+    async def sync(self) -> None:
+        bloom = BloomFilter(self._bloom.size, self._bloom.hashes)
+        self._next_bloom = bloom
+        try:
+            for jti in await self.backend.active():
+                bloom.add(jti)
+            self._bloom = bloom
+        finally:
+            self._next_bloom = None
+
+    async def _sync_forever(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_backends = {
+    "memory": MemoryRevocationBackend,
+    "postgres": PostgresRevocationBackend,
+}
+
+revocation_store = TokenRevocationStore(
+    backend=revocation_backends[settings.api.revocation_backend](),
+    sync_interval=settings.api.revocation_sync_interval,
+)
+cache_invalidator.subscribe("tokens", revocation_store.remember)
@@ -1,7 +1,12 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
 from jose import jwt
 import bcrypt
+import hashlib
 import secrets
+import uuid
 from passlib.context import CryptContext
 from config import settings
 
@@ -24,15 +29,137 @@ def get_password_hash(password: str):
     return pwd_context.hash(password)
 
 
+# Хэш для "холостой" проверки пароля, когда пользователь не найден:
+# время ответа не должно выдавать, существует ли такой логин
+DUMMY_PASSWORD_HASH = get_password_hash(secrets.token_urlsafe(16))
+
+
+class PasswordHashPool:
+    """
+    Пул процессов для bcrypt, чтобы хэширование не блокировало event loop.
+    Число одновременных задач ограничено max_pending: если свободный слот
+    не появился за wait_timeout секунд, запрос отклоняется с 503.
+    Массовые задачи занимают не больше bulk_workers процессов, чтобы импорт
+    не вытеснял проверки паролей при входе.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        wait_timeout: float,
+        bulk_workers: int = 1,
+    ):
+        self.workers = workers
+        self.wait_timeout = wait_timeout
+        self._slots = asyncio.Semaphore(max_pending)
+        self._bulk_slots = asyncio.Semaphore(max(1, min(bulk_workers, workers)))
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func, *args):
+        """Выполнение func в пуле. Без запущенного пула используется пул потоков."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.wait_timeout)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        return await self._execute(func, *args)
+
+    async def run_bulk(self, func, *args):
+        """
+        Выполнение части массовой операции. Слот ждется без таймаута:
+        импорт при нагрузке уступает входу, а не падает с 503
+        """
+        async with self._bulk_slots:
+            await self._slots.acquire()
+            return await self._execute(func, *args)
+
+    async def _execute(self, func, *args):
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._slots.release()
+
+
+hash_pool = PasswordHashPool(
+    workers=settings.hash_pool.workers,
+    max_pending=settings.hash_pool.max_pending,
+    wait_timeout=settings.hash_pool.wait_timeout,
+    bulk_workers=settings.hash_pool.bulk_workers,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Асинхронная проверка пароля в пуле процессов"""
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Асинхронная генерация хэша пароля в пуле процессов"""
+    return await hash_pool.run(get_password_hash, password)
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+async def get_password_hashes_async(passwords: list[str]) -> list[str]:
+    """
+    Хэширование пачки паролей для массовых операций.
+    Пачка делится на небольшие части, которые по очереди проходят через
+    run_bulk: запрос входа ждет в очереди пула не дольше одной части.
+    """
+    if not passwords:
+        return []
+    size = settings.hash_pool.bulk_chunk_size
+    chunks = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(
+        *(hash_pool.run_bulk(get_password_hashes, chunk) for chunk in chunks)
+    )
+    return [password_hash for chunk in results for password_hash in chunk]
+
+
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
+REFRESH_TOKEN_EXPIRE_DAYS = 30
 
 
 def create_jwt_token(data: dict):
     """
     Функция для создания JWT токена.
-    Мы копируем входные данные, добавляем время истечения и кодируем токен.
+    Мы копируем входные данные, добавляем время истечения, идентификатор токена (jti)
+    и кодируем токен.
     """
     payload = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    payload.update({"exp": expire})
+    payload.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(claims=payload, key=settings.api.secret_key, algorithm="HS256")
+
+
+def create_access_token(user_id: int, username: str) -> str:
+    """Функция создания токена доступа: в sub кладется неизменяемый id пользователя"""
+    return create_jwt_token({"sub": str(user_id), "username": username})
+
+
+def create_refresh_token() -> str:
+    """Функция создания непрозрачного refresh токена"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Хэш refresh токена для хранения в БД.
+    Токен случайный и длинный, поэтому достаточно быстрого sha256 вместо bcrypt.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
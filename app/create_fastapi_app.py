@@ -1,19 +1,36 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.openapi.docs import (
     get_redoc_html,
     get_swagger_ui_html,
     get_swagger_ui_oauth2_redirect_html,
 )
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.responses import HTMLResponse
 
+from api.responses import FastJSONResponse
+from core.invalidation import cache_invalidator
+from core.replicas import replica_router
+from core.security import hash_pool
+from core.revocation import revocation_store
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # startup
+    hash_pool.start()
+    revocation_store.start()
+    cache_invalidator.start()
+    replica_router.start()
     yield
+    # shutdown
+    await replica_router.stop()
+    await cache_invalidator.stop()
+    await revocation_store.stop()
+    hash_pool.shutdown()
 
 
 def register_static_docs_routes(app: FastAPI) -> None:
@@ -40,14 +57,25 @@ def register_static_docs_routes(app: FastAPI) -> None:
         )
 
 
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """Пул соединений исчерпан дольше pool_timeout: просим клиента повторить позже"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
 def create_app(
     create_custom_static_urls: bool = False,
 ) -> FastAPI:
     app = FastAPI(
         lifespan=lifespan,
+        default_response_class=FastJSONResponse,
         docs_url=None if create_custom_static_urls else "/docs",
         redoc_url=None if create_custom_static_urls else "/redoc",
     )
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
     if create_custom_static_urls:
         register_static_docs_routes(app)
     return app
@@ -30,7 +30,7 @@ target_metadata = Base.metadata
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
-config.set_main_option("sqlalchemy.url", settings.db.async_url)
+config.set_main_option("sqlalchemy.url", settings.db.direct_url)
 
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,99 @@
+"""add foreign key indexes
+
+Revision ID: 308c835480c2
+Revises: 38c41dcb9833
+Create Date: 2026-10-18 12:31:19.776508
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "308c835480c2"
+down_revision: Union[str, None] = "38c41dcb9833"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя индекса, таблица, колонка, уникальный)
+INDEXES = (
+    ("ix_address_user_id", "address", "user_id", False),
+    ("ix_order_items_item_id", "order_items", "item_id", False),
+    ("ix_order_items_order_id", "order_items", "order_id", False),
+    ("ix_orders_owner_id", "orders", "owner_id", False),
+    ("ix_profiles_user_id", "profiles", "user_id", True),
+)
+
+
+def drop_invalid_index(name: str, table: str) -> None:
+    """
+    Неудачный CREATE INDEX CONCURRENTLY оставляет индекс с indisvalid = false:
+    он замедляет запись и мешает создать индекс с тем же именем заново
+    """
+    invalid = op.get_bind().scalar(
+        sa.text(
+            "SELECT NOT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    )
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # До уникального индекса у пользователя могло появиться несколько
+    # профилей. Какой из них оставить, решает оператор, миграция данные
+    # не удаляет
+    duplicates = op.get_bind().scalar(
+        sa.text(
+            "SELECT count(*) FROM (SELECT user_id FROM profiles "
+            "GROUP BY user_id HAVING count(*) > 1) AS duplicated"
+        )
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} users have more than one profile, so the unique "
+            "index ix_profiles_user_id cannot be built. Keep one profile per "
+            "user and rerun the migration. To keep the latest one:\n"
+            "DELETE FROM profiles AS p USING profiles AS q "
+            "WHERE p.user_id = q.user_id "
+            "AND (p.updated_at, p.id) < (q.updated_at, q.id);"
+        )
+    # CONCURRENTLY не блокирует запись в таблицы,
+    # но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, column, unique in INDEXES:
+            drop_invalid_index(op.f(name), table)
+            try:
+                op.create_index(
+                    op.f(name),
+                    table,
+                    [column],
+                    unique=unique,
+                    postgresql_concurrently=True,
+                )
+            except sa.exc.DBAPIError:
+                # Например, дубликат, вставленный после проверки выше
+                op.drop_index(
+                    op.f(name),
+                    table_name=table,
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+                raise
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                op.f(name),
+                table_name=table,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,33 @@
+"""add order item quantity
+
+Revision ID: ce3ac83cc689
+Revises: 52f698de5fa6
+Create Date: 2026-10-18 12:40:12.518304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "ce3ac83cc689"
+down_revision: Union[str, None] = "52f698de5fa6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "order_items",
+        sa.Column(
+            "quantity", sa.Integer(), server_default="1", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("order_items", "quantity")
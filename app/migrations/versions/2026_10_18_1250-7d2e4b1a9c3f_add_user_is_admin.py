@@ -0,0 +1,33 @@
+"""add user is_admin
+
+Revision ID: 7d2e4b1a9c3f
+Revises: ce3ac83cc689
+Create Date: 2026-10-18 12:50:41.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2e4b1a9c3f"
+down_revision: Union[str, None] = "ce3ac83cc689"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "is_admin", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "is_admin")
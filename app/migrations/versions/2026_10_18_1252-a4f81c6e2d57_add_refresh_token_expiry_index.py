@@ -0,0 +1,41 @@
+"""add refresh token expiry index
+
+Revision ID: a4f81c6e2d57
+Revises: 7d2e4b1a9c3f
+Create Date: 2026-10-18 12:52:07.318842
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f81c6e2d57"
+down_revision: Union[str, None] = "7d2e4b1a9c3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицу, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_refresh_tokens_expires_at"),
+            "refresh_tokens",
+            ["expires_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_refresh_tokens_expires_at"),
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
@@ -6,7 +6,9 @@ __all__ = (
     "Product",
     "OrderItem",
     "Address",
-    "Profile"
+    "Profile",
+    "RevokedToken",
+    "RefreshToken",
 )
 
 from .base import Base, async_engine
@@ -16,4 +18,6 @@ from .product import Product
 from .order_items import OrderItem
 from .address import Address
 from .profile import Profile
+from .revoked_token import RevokedToken
+from .refresh_token import RefreshToken
 
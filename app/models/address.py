@@ -31,10 +31,12 @@ class Address(Base):
             "users.id",
             ondelete="CASCADE",
         ),
+        index=True,
     )
 
     user: Mapped["User"] = relationship(
         back_populates="address",
+        lazy="raise",
     )
 
     def __str__(self):
@@ -1,6 +1,8 @@
 from datetime import datetime
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from config import settings
+from core.pool import InstrumentedQueuePool, PoolMetrics
 
 from sqlalchemy import (
     MetaData,
@@ -15,12 +17,38 @@ from sqlalchemy.orm import (
 )
 
 
-async_engine = create_async_engine(
-    url=settings.db.async_url,
-    echo=settings.db.echo,
-    pool_size=settings.db.pool_size,
-    max_overflow=settings.db.max_overflow,
-)
+def create_engine(url: str) -> AsyncEngine:
+    metrics = PoolMetrics()
+    connect_args = {}
+    if settings.db.pgbouncer:
+        # В режиме transaction PgBouncer отдает каждую транзакцию любому
+        # серверному соединению: подготовленные запросы не кэшируем,
+        # а их имена делаем уникальными
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    engine = create_async_engine(
+        url=url,
+        echo=settings.db.echo,
+        echo_pool=settings.db.echo_pool,
+        poolclass=InstrumentedQueuePool,
+        metrics=metrics,
+        pool_size=settings.db.effective_pool_size,
+        max_overflow=settings.db.max_overflow,
+        pool_timeout=settings.db.pool_timeout,
+        pool_pre_ping=settings.db.pool_pre_ping,
+        pool_recycle=settings.db.pool_recycle,
+        connect_args=connect_args,
+    )
+    metrics.attach(engine)
+    return engine
+
+
+async_engine = create_engine(settings.db.async_url)
+
+replica_engines = [create_engine(url) for url in settings.db.replica_urls]
 
 async_session = async_sessionmaker(
     bind=async_engine,
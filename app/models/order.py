@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 from sqlalchemy import (
     String,
@@ -26,12 +26,17 @@ class Order(Base):
             "users.id",
             ondelete="CASCADE",
         ),
+        index=True,
     )
     owner: Mapped["User"] = relationship(
         back_populates="order",
+        lazy="raise",
     )
-    order_item: Mapped["OrderItem"] = relationship(
+    order_item: Mapped[List["OrderItem"]] = relationship(
         back_populates="order",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __str__(self):
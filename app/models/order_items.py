@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy import (
     ForeignKey,
+    Integer,
 )
 from sqlalchemy.orm import (
     Mapped,
@@ -25,18 +26,23 @@ class OrderItem(Base):
             "orders.id",
             ondelete="CASCADE",
         ),
+        index=True,
     )
     item_id: Mapped[int] = mapped_column(
         ForeignKey(
             "products.id",
             ondelete="CASCADE",
         ),
+        index=True,
     )
+    quantity: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
     item: Mapped["Product"] = relationship(
         back_populates="order",
+        lazy="raise",
     )
     order: Mapped["Order"] = relationship(
         back_populates="order_item",
+        lazy="raise",
     )
 
     def __str__(self):
@@ -1,12 +1,15 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 from sqlalchemy import (
     String,
     Integer,
     Numeric,
+    Computed,
+    Index,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -19,16 +22,45 @@ if TYPE_CHECKING:
     from .order_items import OrderItem
 
 
+# Конфигурация полнотекстового поиска: русская морфология, латиница по английской
+SEARCH_CONFIG = "russian"
+
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index(
+            "ix_products_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     name: Mapped[str] = mapped_column(String(50))
     description: Mapped[str] = mapped_column(String(250))
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0)
     quantity: Mapped[int] = mapped_column(Integer, default=0)
     image_url: Mapped[str] = mapped_column(String(150))
-    order: Mapped["OrderItem"] = relationship(
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+    order: Mapped[List["OrderItem"]] = relationship(
         back_populates="item",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __str__(self):
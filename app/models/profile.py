@@ -35,21 +35,13 @@ class Profile(Base):
             "users.id",
             ondelete="CASCADE",
         ),
+        unique=True,
+        index=True,
     )
     user: Mapped["User"] = relationship(
         back_populates="profile",
+        lazy="raise",
     )
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
-
-    @property
-    def get_schemas(self) -> dict[str, str]:
-        return {
-            "first_name": self.first_name,
-            "last_name": self.last_name,
-            "phone": self.phone,
-        }
-
-
-
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    String,
+    ForeignKey,
+    TIMESTAMP,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from .base import Base
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    family_id: Mapped[str] = mapped_column(String(32), index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "users.id",
+            ondelete="CASCADE",
+        ),
+        index=True,
+    )
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, index=True)
+    used_at: Mapped[datetime | None] = mapped_column(TIMESTAMP, default=None)
+    revoked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP, default=None)
+
+    def __str__(self):
+        return self.family_id
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    String,
+    TIMESTAMP,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+
+from .base import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(36), unique=True)
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, index=True)
+
+    def __str__(self):
+        return self.jti
@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING, List
 
 from sqlalchemy import (
     String,
+    false,
 )
 from sqlalchemy.orm import (
     Mapped,
@@ -27,28 +28,29 @@ class User(Base):
         default=None,
     )
     email: Mapped[str] = mapped_column(String(30), unique=True)
+    # Доступ к служебным маршрутам: метрики, выгрузка и загрузка пользователей
+    is_admin: Mapped[bool] = mapped_column(default=False, server_default=false())
+    # Связанные строки при удалении пользователя удаляются, а не получают
+    # NULL во внешнем ключе (он NOT NULL): загруженные (админка их загружает)
+    # удаляет ORM, остальные - ON DELETE CASCADE в БД
     order: Mapped[List["Order"]] = relationship(
         back_populates="owner",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     address: Mapped["Address"] = relationship(
         back_populates="user",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     profile: Mapped["Profile"] = relationship(
         back_populates="user",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __str__(self):
         return f"{self.username}"
-
-    @property
-    def get_schemas(self) -> dict[str, str]:
-        return {
-            "username": self.username,
-            "email": self.email,
-        }
-
-    @property
-    def get_username_password(self) -> dict:
-        return {"username": self.username, "password_hash": self.password_hash}
-
-
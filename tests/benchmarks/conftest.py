@@ -0,0 +1,112 @@
+"""
+Замеры производительности на засеянной базе.
+
+По умолчанию не запускаются (маркер benchmark исключен в addopts):
+
+    python -m pytest -m benchmark -s tests/benchmarks
+
+Засев ограничен BENCHMARK_MAX_ROWS строк (по умолчанию 1 000 000), результаты
+печатаются таблицами. Проверки в замерах касаются формы зависимости
+(например, задержка не растет с размером таблицы), а не абсолютного времени.
+Засеянные строки удаляются после каждого модуля.
+"""
+
+import os
+import statistics
+import time
+
+import pytest_asyncio
+from sqlalchemy import text
+
+MAX_ROWS = int(os.environ.get("BENCHMARK_MAX_ROWS", 1_000_000))
+
+# Префикс логинов засеянных пользователей, по нему они удаляются
+BENCH_PREFIX = "bench"
+
+
+def sizes(*candidates: int) -> list[int]:
+    """Размеры засева, не превышающие BENCHMARK_MAX_ROWS"""
+    return [size for size in candidates if size <= MAX_ROWS] or [MAX_ROWS]
+
+
+async def timings(func, repeat: int) -> list[float]:
+    """Время каждого из repeat вызовов корутинной функции, в секундах"""
+    result = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        await func(i)
+        result.append(time.perf_counter() - started)
+    return result
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q / 100 * (len(values) - 1)))]
+
+
+def summary(values: list[float], scale: float = 1000) -> tuple[float, float, float]:
+    """Медиана, p95 и p99 в миллисекундах"""
+    return (
+        statistics.median(values) * scale,
+        percentile(values, 95) * scale,
+        percentile(values, 99) * scale,
+    )
+
+
+def report(title: str, header: tuple[str, ...], rows: list[tuple]) -> None:
+    widths = [
+        max(
+            len(str(cell if not isinstance(cell, float) else f"{cell:.3f}"))
+            for cell in column
+        )
+        for column in zip(header, *rows)
+    ]
+
+    def line(cells):
+        return "  ".join(
+            (f"{cell:.3f}" if isinstance(cell, float) else str(cell)).rjust(width)
+            for cell, width in zip(cells, widths)
+        )
+
+    print(f"\n{title}\n{line(header)}")
+    for row in rows:
+        print(line(row))
+
+
+async def seed_users(first: int, last: int, password_hash: str) -> None:
+    """Пользователи bench<first>..bench<last> с пустыми профилями"""
+    from models.base import async_engine
+
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            text("""
+                WITH created AS (
+                    INSERT INTO users (username, email, password_hash)
+                    SELECT :prefix || i, :prefix || i || '@example.com', :hash
+                    FROM generate_series(CAST(:first AS integer), :last) AS i
+                    RETURNING id
+                )
+                INSERT INTO profiles (user_id, first_name, last_name, phone)
+                SELECT id, 'Bench', 'User', '+70000000000' FROM created
+                """),
+            {
+                "prefix": BENCH_PREFIX,
+                "first": first,
+                "last": last,
+                "hash": password_hash,
+            },
+        )
+        await connection.execute(text("ANALYZE users, profiles"))
+
+
+@pytest_asyncio.fixture(scope="module")
+async def bench_users(database):
+    """Удаление засеянных пользователей после модуля"""
+    from models.base import async_engine
+
+    yield
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            text("DELETE FROM users WHERE username LIKE :prefix"),
+            {"prefix": BENCH_PREFIX + "%"},
+        )
@@ -0,0 +1,60 @@
+import gc
+import os
+import time
+
+import pytest
+
+from api.profiles.views import export_profiles
+from api.token import Principal
+from api.users.views import export_users
+from core.security import get_password_hash
+from tests.conftest import PASSWORD
+from .conftest import report, seed_users, sizes
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = sizes(100_000, 1_000_000)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+async def drain(response) -> tuple[int, float, float]:
+    """Чтение ответа по частям, как его отправляет сервер: байты, секунды, пик RSS"""
+    gc.collect()
+    baseline = peak = rss_mb()
+    size = 0
+    started = time.perf_counter()
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+        peak = max(peak, rss_mb())
+    return size, time.perf_counter() - started, peak - baseline
+
+
+async def test_export_memory_does_not_grow_with_table(app, bench_users):
+    admin = Principal(id=1, username="admin")
+    password_hash = get_password_hash(PASSWORD)
+    rows, growth = [], []
+    seeded = 0
+    for size in SIZES:
+        await seed_users(seeded + 1, size, password_hash)
+        seeded = size
+        for name, export, export_format in (
+            ("users ndjson", export_users, "ndjson"),
+            ("profiles csv", export_profiles, "csv"),
+        ):
+            response = await export(admin, export_format)
+            length, elapsed, rss = await drain(response)
+            rows.append((size, name, length / 2**20, elapsed, rss))
+            growth.append(rss)
+
+    report(
+        "Streaming export (response body read chunk by chunk)",
+        ("seeded", "export", "body MB", "seconds", "RSS growth MB"),
+        rows,
+    )
+    # Пачки по EXPORT_BATCH_SIZE строк: рост памяти не зависит от числа строк
+    assert max(growth) < 64
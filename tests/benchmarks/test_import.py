@@ -0,0 +1,64 @@
+import json
+import math
+import time
+
+import pytest
+
+from config import settings
+from core.security import get_password_hash
+from tests.conftest import PASSWORD
+from .conftest import BENCH_PREFIX, report
+
+pytestmark = pytest.mark.benchmark
+
+RECORDS = 100
+TARGET_PER_MINUTE = 10_000
+
+
+async def test_import_throughput(client, make_admin, bench_users):
+    admin = await make_admin()
+    body = "\n".join(
+        json.dumps(
+            {
+                "username": f"{BENCH_PREFIX}i{i}",
+                "email": f"{BENCH_PREFIX}i{i}@example.com",
+                "password": PASSWORD,
+                "phone": "+79001112233",
+            }
+        )
+        for i in range(RECORDS)
+    )
+
+    started = time.perf_counter()
+    get_password_hash(PASSWORD)
+    hash_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/users/import", content=body, headers=admin["headers"]
+    )
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == RECORDS
+
+    per_minute = RECORDS / elapsed * 60
+    per_process = 60 / hash_seconds
+    report(
+        f"Import of {RECORDS} users, bulk_workers={settings.hash_pool.bulk_workers}",
+        (
+            "bcrypt s/hash",
+            "users/min",
+            "users/min per process",
+            "processes for 10k/min",
+        ),
+        [
+            (
+                hash_seconds,
+                per_minute,
+                per_process,
+                math.ceil(TARGET_PER_MINUTE / per_process),
+            )
+        ],
+    )
+    # Импорт упирается в bcrypt: не быстрее, чем хэшируют выделенные процессы
+    assert per_minute <= per_process * settings.hash_pool.bulk_workers * 1.2
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from api.users.crud import UsersCRUD
+from core.security import get_password_hash
+from models.base import async_session
+from tests.conftest import PASSWORD
+from .conftest import BENCH_PREFIX, report, seed_users, sizes, summary, timings
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = sizes(1_000, 10_000, 100_000, 1_000_000)
+
+
+async def test_login_latency_is_flat_in_table_size(client, bench_users):
+    password_hash = get_password_hash(PASSWORD)
+    rows, lookup_medians = [], []
+    seeded = 0
+    for size in SIZES:
+        await seed_users(seeded + 1, size, password_hash)
+        seeded = size
+
+        async with async_session() as session:
+            crud = UsersCRUD(session)
+
+            async def lookup(_):
+                user = await crud.get_auth_by_name(
+                    f"{BENCH_PREFIX}{random.randint(1, size)}"
+                )
+                assert user is not None
+
+            await timings(lookup, 20)  # прогрев пула и кэша планов
+            lookup_times = await timings(lookup, 500)
+
+        async def login(_):
+            response = await client.post(
+                "/login",
+                data={
+                    "username": f"{BENCH_PREFIX}{random.randint(1, size)}",
+                    "password": PASSWORD,
+                },
+            )
+            assert response.status_code == 200
+
+        login_times = await timings(login, 20)
+        lookup_summary, login_summary = summary(lookup_times), summary(login_times)
+        lookup_medians.append(lookup_summary[0])
+        rows.append((size, *lookup_summary, *login_summary))
+
+    report(
+        "Login by username, ms (lookup = indexed SELECT, login = POST /login with bcrypt)",
+        ("users", "lookup p50", "p95", "p99", "login p50", "p95", "p99"),
+        rows,
+    )
+    # Поиск по уникальному индексу: от размера таблицы почти не зависит
+    assert lookup_medians[-1] <= 3 * lookup_medians[0] + 1
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+import api.dependencies
+from core.security import verify_password
+from tests.conftest import PASSWORD
+from .conftest import report, summary, timings
+
+pytestmark = pytest.mark.benchmark
+
+STORM_CONCURRENCY = 32
+REQUESTS = 300
+# С bcrypt в цикле каждый запрос ждет чужие проверки, хватит меньшей выборки
+BLOCKING_REQUESTS = 30
+
+
+async def blocking_verify(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля прямо в цикле событий, как до пула процессов"""
+    return verify_password(plain_password, hashed_password)
+
+
+async def me_latencies(
+    client, headers, storm_user: str | None, requests: int = REQUESTS
+) -> list[float]:
+    stop = asyncio.Event()
+
+    async def login_forever():
+        while not stop.is_set():
+            await client.post(
+                "/login", data={"username": storm_user, "password": PASSWORD}
+            )
+
+    storm = (
+        [asyncio.create_task(login_forever()) for _ in range(STORM_CONCURRENCY)]
+        if storm_user
+        else []
+    )
+    await asyncio.sleep(0.5 if storm_user else 0)
+
+    async def me(_):
+        response = await client.get("/api/users/me", headers=headers)
+        assert response.status_code == 200
+
+    try:
+        return await timings(me, requests)
+    finally:
+        stop.set()
+        await asyncio.gather(*storm)
+
+
+async def test_me_p99_under_login_storm(client, make_user, monkeypatch):
+    user = await make_user()
+    headers = user["headers"]
+    rows = [("idle", *summary(await me_latencies(client, headers, None)))]
+
+    storm = summary(await me_latencies(client, headers, user["username"]))
+    rows.append(("login storm, process pool", *storm))
+
+    monkeypatch.setattr(api.dependencies, "verify_password_async", blocking_verify)
+    blocking = summary(
+        await me_latencies(client, headers, user["username"], BLOCKING_REQUESTS)
+    )
+    rows.append(("login storm, bcrypt in loop", *blocking))
+
+    report(
+        f"GET /api/users/me, ms, {STORM_CONCURRENCY} concurrent logins",
+        ("mode", "p50", "p95", "p99"),
+        rows,
+    )
+    assert storm[2] < blocking[2]
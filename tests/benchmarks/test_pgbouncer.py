@@ -0,0 +1,61 @@
+import asyncio
+import os
+import time
+
+import pytest
+from sqlalchemy import select
+
+from config import settings
+from models import User
+from models.base import create_engine
+from .conftest import report
+
+pytestmark = pytest.mark.benchmark
+
+WORKERS = (2, 8, 32)
+DURATION = 3.0
+# Адрес PgBouncer в режиме transaction; без него оба режима идут напрямую
+# в Postgres, и замер показывает цену отключенного кэша запросов в клиенте
+PGBOUNCER_URL = os.environ.get("BENCHMARK_PGBOUNCER_URL")
+
+
+async def queries_per_second(url: str, workers: int) -> float:
+    engine = create_engine(url)
+    deadline = time.perf_counter() + DURATION
+    done = 0
+
+    async def worker(i: int):
+        nonlocal done
+        async with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                await connection.scalar(select(User.username).where(User.id == i))
+                await connection.commit()
+                done += 1
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(workers)))
+        return done / (time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+
+async def test_pgbouncer_mode_throughput(database, monkeypatch):
+    monkeypatch.setattr(settings.db, "pool_sizing", "fixed")
+    rows = []
+    for workers in WORKERS:
+        monkeypatch.setattr(settings.db, "pool_size", workers)
+        monkeypatch.setattr(settings.db, "pgbouncer", False)
+        direct = await queries_per_second(settings.db.async_url, workers)
+        monkeypatch.setattr(settings.db, "pgbouncer", True)
+        pgbouncer = await queries_per_second(
+            PGBOUNCER_URL or settings.db.async_url, workers
+        )
+        rows.append((workers, direct, pgbouncer, pgbouncer / direct))
+
+    report(
+        "Point SELECT per transaction, queries/s"
+        + ("" if PGBOUNCER_URL else " (pgbouncer mode against Postgres directly)"),
+        ("connections", "direct", "pgbouncer mode", "ratio"),
+        rows,
+    )
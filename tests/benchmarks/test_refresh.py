@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from tests.conftest import PASSWORD
+from .conftest import report, summary, timings
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS = 100
+CONCURRENCY = 16
+
+
+async def test_refresh_is_cheaper_than_login(client, make_user):
+    user = await make_user()
+    refresh_token = user["tokens"]["refresh_token"]
+
+    async def login(_):
+        response = await client.post(
+            "/login", data={"username": user["username"], "password": PASSWORD}
+        )
+        assert response.status_code == 200
+        return response.json()["refresh_token"]
+
+    async def refresh(_):
+        nonlocal refresh_token
+        response = await client.post(
+            "/token/refresh", json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 200
+        refresh_token = response.json()["refresh_token"]
+
+    async def throughput(func) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(func(i) for i in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - started)
+
+    login_times = await timings(login, REQUESTS // 5)
+    refresh_times = await timings(refresh, REQUESTS)
+    login_rps = await throughput(login)
+
+    # У каждого клиента своя цепочка refresh токенов
+    chains = await asyncio.gather(*(login(i) for i in range(CONCURRENCY)))
+
+    async def refresh_chain(i):
+        token = chains[i % CONCURRENCY]
+        for _ in range(REQUESTS // CONCURRENCY):
+            response = await client.post(
+                "/token/refresh", json={"refresh_token": token}
+            )
+            assert response.status_code == 200
+            token = response.json()["refresh_token"]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(refresh_chain(i) for i in range(CONCURRENCY)))
+    refresh_rps = (
+        REQUESTS // CONCURRENCY * CONCURRENCY / (time.perf_counter() - started)
+    )
+
+    report(
+        "Getting a new access token",
+        ("path", "p50 ms", "p95 ms", "p99 ms", "req/s"),
+        [
+            ("POST /login (bcrypt)", *summary(login_times), login_rps),
+            ("POST /token/refresh", *summary(refresh_times), refresh_rps),
+        ],
+    )
+    assert refresh_rps > login_rps
@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.pagination import Page
+from api.responses import FastJSONResponse
+from api.users.schemas import UserRead
+from .conftest import report
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = 10_000
+ROUNDS = 20
+
+
+def cpu_ms(render) -> float:
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        render()
+    return (time.process_time() - started) / ROUNDS * 1000
+
+
+def test_fast_json_response_cpu():
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "updated_at": now}
+        for i in range(ROWS)
+    ]
+    page = {"items": rows, "next_cursor": "eyJpZCI6MTB9"}
+    users_page = Page[UserRead]
+
+    results = [
+        (
+            "jsonable_encoder + JSONResponse",
+            cpu_ms(lambda: JSONResponse(jsonable_encoder(page)).body),
+        ),
+        (
+            "response_model validation + JSONResponse",
+            cpu_ms(
+                lambda: JSONResponse(
+                    users_page.model_validate(page).model_dump(mode="json")
+                ).body
+            ),
+        ),
+        ("FastJSONResponse", cpu_ms(lambda: FastJSONResponse(page).body)),
+    ]
+    report(
+        f"Rendering a page of {ROWS} users, CPU ms per response",
+        ("path", "CPU ms"),
+        results,
+    )
+    assert results[-1][1] < min(cpu for _, cpu in results[:-1])
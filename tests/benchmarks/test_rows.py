@@ -0,0 +1,59 @@
+import time
+import tracemalloc
+
+import pytest
+from sqlalchemy import select
+
+from api.users.crud import USER_READ_COLUMNS
+from core.security import get_password_hash
+from models import User
+from models.base import async_session
+from tests.conftest import PASSWORD
+from .conftest import BENCH_PREFIX, report, seed_users
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = 100_000
+
+
+async def orm_objects() -> list[dict]:
+    """Чтение до перехода на строки: ORM-объекты в identity map"""
+    async with async_session() as session:
+        users = await session.scalars(
+            select(User).where(User.username.like(BENCH_PREFIX + "%"))
+        )
+        return [{"username": user.username, "email": user.email} for user in users]
+
+
+async def plain_rows() -> list[dict]:
+    async with async_session() as session:
+        result = await session.execute(
+            select(*USER_READ_COLUMNS).where(User.username.like(BENCH_PREFIX + "%"))
+        )
+        return [row._asdict() for row in result]
+
+
+async def test_plain_rows_cost_less_than_orm_objects(database, bench_users):
+    await seed_users(1, ROWS, get_password_hash(PASSWORD))
+    results = []
+    for read in (orm_objects, plain_rows):
+        await read()  # прогрев
+        started = time.process_time()
+        users = await read()
+        cpu = time.process_time() - started
+        assert len(users) == ROWS
+        del users
+        # Память отдельным проходом: tracemalloc сам заметно тратит CPU
+        tracemalloc.start()
+        await read()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append((read.__name__, cpu * 1000, peak / 2**20))
+
+    report(
+        f"Reading {ROWS} users as dicts, per 100k rows",
+        ("path", "CPU ms", "peak MB"),
+        results,
+    )
+    assert results[1][1] < results[0][1]
+    assert results[1][2] < results[0][2]
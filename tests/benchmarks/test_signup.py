@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import delete, select
+
+import api.users.crud
+from api.profiles.schemas import ProfileRead
+from api.users.crud import UsersCRUD
+from api.users.schemas import User as UserSchema
+from core.security import get_password_hash
+from models import Profile, User
+from models.base import async_session
+from tests.conftest import PASSWORD
+from .conftest import BENCH_PREFIX, report, summary, timings
+
+pytestmark = pytest.mark.benchmark
+
+SIGNUPS = 500
+
+
+def signup(i: int, flow: str) -> tuple[UserSchema, ProfileRead]:
+    username = f"{BENCH_PREFIX}{flow}{i}"
+    return (
+        UserSchema(
+            username=username, email=f"{username}@example.com", password=PASSWORD
+        ),
+        ProfileRead(first_name="Bench", last_name="User", phone="+70000000000"),
+    )
+
+
+async def four_round_trips(user_in: UserSchema, profile_in: ProfileRead) -> None:
+    """Регистрация до объединения: два коммита и поиск id по логину"""
+    async with async_session() as session:
+        params = user_in.model_dump()
+        params["password_hash"] = await api.users.crud.get_password_hash_async(
+            params.pop("password")
+        )
+        session.add(User(**params))
+        await session.commit()
+        user_id = await session.scalar(
+            select(User.id).where(User.username == user_in.username)
+        )
+        session.add(Profile(user_id=user_id, **profile_in.model_dump()))
+        await session.commit()
+
+
+async def single_transaction(user_in: UserSchema, profile_in: ProfileRead) -> None:
+    async with async_session() as session:
+        await UsersCRUD(session).create(user_in, profile_in)
+
+
+async def test_signup_throughput(database, monkeypatch):
+    # Хэш считается заранее: bcrypt одинаков в обоих вариантах и скрыл бы разницу
+    password_hash = get_password_hash(PASSWORD)
+
+    async def precomputed_hash(password: str) -> str:
+        return password_hash
+
+    monkeypatch.setattr(api.users.crud, "get_password_hash_async", precomputed_hash)
+    rows = []
+    try:
+        for flow, create in (
+            ("old", four_round_trips),
+            ("new", single_transaction),
+        ):
+
+            async def one(i):
+                await create(*signup(i, flow))
+
+            times = await timings(one, SIGNUPS)
+            rows.append((create.__name__, *summary(times), 60 / (sum(times) / SIGNUPS)))
+    finally:
+        async with async_session() as session:
+            await session.execute(
+                delete(User).where(User.username.like(BENCH_PREFIX + "%"))
+            )
+            await session.commit()
+
+    report(
+        f"Signup without bcrypt, {SIGNUPS} sequential signups",
+        ("flow", "p50 ms", "p95 ms", "p99 ms", "signups/min"),
+        rows,
+    )
+    assert rows[1][1] < rows[0][1]
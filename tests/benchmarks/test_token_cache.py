@@ -0,0 +1,42 @@
+import time
+
+import pytest
+from jose import jwt
+
+from api.dependencies import decode_token, token_cache
+from config import settings
+from core.security import create_access_token
+from .conftest import report
+
+pytestmark = pytest.mark.benchmark
+
+TOKENS = 1000
+ROUNDS = 20
+
+
+def per_call_us(func, tokens: list[str]) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for token in tokens:
+            func(token)
+    return (time.perf_counter() - started) / (ROUNDS * len(tokens)) * 1e6
+
+
+def test_cached_decode_is_cheaper_than_signature_check(app):
+    tokens = [create_access_token(i, f"user{i}") for i in range(1, TOKENS + 1)]
+    for token in tokens:
+        decode_token(token)
+
+    decode = per_call_us(
+        lambda token: jwt.decode(token, settings.api.secret_key), tokens
+    )
+    cached = per_call_us(decode_token, tokens)
+    for token in tokens:
+        token_cache.pop(token)
+
+    report(
+        f"Access token check, us per call, {TOKENS} distinct tokens",
+        ("path", "us/call"),
+        [("jwt.decode", decode), ("decode_token, cache hit", cached)],
+    )
+    assert cached < decode
@@ -0,0 +1,254 @@
+"""
+Общие фикстуры тестов.
+
+Тесты работают с настоящим Postgres: сервер и учетные данные берутся из тех же
+настроек, что и у приложения (DB__HOST, DB__PORT, DB__USER, DB__PASSWORD),
+а база подменяется на отдельную тестовую (TEST_DB_NAME, по умолчанию otus_test).
+Она пересоздается в начале сессии и мигрируется alembic до head.
+Для поиска по товарам на сервере нужно расширение pg_trgm (есть в образе postgres).
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+# Настройки читаются при импорте модулей приложения, поэтому подменяем их до него
+os.environ["DB__NAME"] = os.environ.get("TEST_DB_NAME", "otus_test")
+os.environ["DB__ECHO"] = "0"
+# Отзыв токенов общий для воркеров, а перестройка фильтра не успевает за тестом
+os.environ["API__REVOCATION_BACKEND"] = "postgres"
+os.environ["API__REVOCATION_SYNC_INTERVAL"] = "3600"
+
+import asyncpg
+import httpx
+import pytest
+import pytest_asyncio
+from jose import jwt
+from sqlalchemy import event
+
+from config import settings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PASSWORD = "password1"
+
+
+async def admin_connection() -> asyncpg.Connection:
+    """Соединение со служебной базой postgres того же сервера"""
+    return await asyncpg.connect(
+        host=settings.db.direct_host or settings.db.host,
+        port=settings.db.direct_port or settings.db.port,
+        user=settings.db.user,
+        password=settings.db.password,
+        database="postgres",
+    )
+
+
+async def recreate_database(name: str = settings.db.name) -> None:
+    connection = await admin_connection()
+    try:
+        await connection.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        await connection.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        await connection.close()
+
+
+async def drop_database(name: str) -> None:
+    connection = await admin_connection()
+    try:
+        await connection.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    finally:
+        await connection.close()
+
+
+async def migrate_database(
+    revision: str = "head", name: str = settings.db.name
+) -> None:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "alembic",
+        "upgrade",
+        revision,
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT / "app"), "DB__NAME": name},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+    if process.returncode:
+        pytest.fail(f"alembic upgrade {revision} failed:\n{output.decode()}")
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError("Condition was not met in time")
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def database():
+    await recreate_database()
+    await migrate_database()
+    yield
+    from models.base import async_engine, replica_engines
+
+    for engine in (async_engine, *replica_engines):
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def app(database):
+    """Приложение с запущенным lifespan: пул хэширования, LISTEN и т.п."""
+    from core.invalidation import cache_invalidator
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        await wait_for(lambda: cache_invalidator.connected)
+        yield app
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def session(database):
+    """Сессия основного сервера для подготовки и проверки данных"""
+    from models.base import async_session
+
+    async with async_session() as session:
+        yield session
+
+
+@pytest.fixture
+def queries(database):
+    """SQL-запросы, отправленные на основной сервер за время теста"""
+    from models.base import async_engine
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    yield statements
+    event.remove(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+def unique_name(prefix: str = "u") -> str:
+    """Уникальный логин: тесты не чистят базу и не мешают друг другу"""
+    return prefix + uuid.uuid4().hex[:12]
+
+
+def unique_word() -> str:
+    """Уникальное слово для поиска: только буквы, цифры стеммер и триграммы
+    разбирают по-своему"""
+    return "".join(chr(ord("a") + int(c, 16)) for c in uuid.uuid4().hex[:8])
+
+
+@pytest.fixture
+def make_user(client):
+    """Регистрация и вход нового пользователя"""
+
+    async def make_user(profile: dict | None = None) -> dict:
+        username = unique_name()
+        body = {
+            "user_in": {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": PASSWORD,
+            },
+            "profile_in": profile
+            or {"first_name": "Test", "last_name": "User", "phone": "+79001234567"},
+        }
+        response = await client.post("/api/users", json=body)
+        assert response.status_code == 200, response.text
+        response = await client.post(
+            "/login", data={"username": username, "password": PASSWORD}
+        )
+        assert response.status_code == 200, response.text
+        tokens = response.json()
+        return {
+            "id": int(jwt.get_unverified_claims(tokens["access_token"])["sub"]),
+            "username": username,
+            "tokens": tokens,
+            "headers": {"Authorization": f"Bearer {tokens['access_token']}"},
+        }
+
+    return make_user
+
+
+@pytest.fixture
+def make_admin(make_user):
+    """Пользователь с правами администратора"""
+    from sqlalchemy import update
+
+    from models import User
+    from models.base import async_session
+
+    async def make_admin() -> dict:
+        user = await make_user()
+        async with async_session() as session:
+            await session.execute(
+                update(User).where(User.id == user["id"]).values(is_admin=True)
+            )
+            await session.commit()
+        return user
+
+    return make_admin
+
+
+@pytest.fixture
+def make_product(database):
+    """Товар, созданный через ORM: как из админки, с уведомлением об изменении"""
+    from models import Product
+    from models.base import async_session
+
+    async def make_product(**fields) -> int:
+        fields = {
+            "name": unique_name("product "),
+            "description": "",
+            "price": 100,
+            "quantity": 10,
+            "image_url": "",
+            **fields,
+        }
+        async with async_session() as session:
+            product = Product(**fields)
+            session.add(product)
+            await session.commit()
+            return product.id
+
+    return make_product
+
+
+@pytest_asyncio.fixture
+async def broken_replica(app):
+    """
+    "Реплика" без таблиц приложения: любое чтение с нее падает,
+    так что успешный ответ означает чтение с основного сервера.
+    Подключается как настоящая: через список реплик и проверку отставания
+    """
+    from core.replicas import replica_router
+    from models.base import create_engine
+
+    engine = create_engine(settings.db.async_url.rsplit("/", 1)[0] + "/postgres")
+    engines, replica_router.engines = replica_router.engines, [engine]
+    await replica_router.check()
+    assert replica_router.stats["healthy"] == 1
+    yield engine
+    replica_router.engines = engines
+    await replica_router.check()
+    await engine.dispose()
@@ -0,0 +1,36 @@
+from .conftest import PASSWORD, unique_name
+
+
+async def test_login_looks_up_one_user_by_username(client, make_user, queries):
+    user = await make_user()
+    queries.clear()
+
+    response = await client.post(
+        "/login", data={"username": user["username"], "password": PASSWORD}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+    lookups = [statement for statement in queries if "FROM users" in statement]
+    assert len(lookups) == 1
+    assert "WHERE users.username = " in lookups[0]
+
+
+async def test_login_with_wrong_password(client, make_user):
+    user = await make_user()
+
+    response = await client.post(
+        "/login", data={"username": user["username"], "password": "wrong-password"}
+    )
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect username or password"
+
+
+async def test_login_of_unknown_user_looks_like_wrong_password(client):
+    response = await client.post(
+        "/login", data={"username": unique_name(), "password": PASSWORD}
+    )
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect username or password"
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+
+from api.etag import etag_matches, make_etag
+
+RESOURCES = ("/api/users/me", "/api/users/me/profile")
+
+
+def test_etag_weak_comparison():
+    etag = make_etag(1, datetime(2026, 10, 18, 12, 0, 0, 123))
+
+    assert etag.startswith('W/"1-')
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"1-0"', etag)
+    assert not etag_matches(None, etag)
+
+
+@pytest.mark.parametrize("url", RESOURCES)
+async def test_unchanged_resource_is_not_modified(client, make_user, url):
+    user = await make_user()
+    response = await client.get(url, headers=user["headers"])
+    etag = response.headers["ETag"]
+
+    response = await client.get(url, headers={**user["headers"], "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+async def test_etag_changes_after_update(client, make_user):
+    user = await make_user()
+    url = "/api/users/me/profile"
+    etag = (await client.get(url, headers=user["headers"])).headers["ETag"]
+
+    response = await client.patch(
+        url, json={"first_name": "Changed"}, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.get(url, headers={**user["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["user info"]["first_name"] == "Changed"
+
+
+async def test_if_match_guards_updates(client, make_user):
+    user = await make_user()
+    url = "/api/users/me/profile"
+    etag = (await client.get(url, headers=user["headers"])).headers["ETag"]
+    body = {"first_name": "First", "last_name": "Writer", "phone": "+79001112233"}
+
+    response = await client.put(
+        url, json=body, headers={**user["headers"], "If-Match": etag}
+    )
+    assert response.status_code == 200, response.text
+
+    # Второй клиент пишет со старым ETag и получает 412, а не затирает изменения
+    response = await client.put(
+        url,
+        json={**body, "first_name": "Second"},
+        headers={**user["headers"], "If-Match": etag},
+    )
+    assert response.status_code == 412
+    response = await client.get(url, headers=user["headers"])
+    assert response.json()["user info"]["first_name"] == "First"
+
+
+async def test_if_match_on_user_patch(client, make_user):
+    user = await make_user()
+    url = "/api/users/me"
+    etag = (await client.get(url, headers=user["headers"])).headers["ETag"]
+
+    response = await client.patch(
+        url,
+        json={"email": f"new{user['username']}@example.com"},
+        headers={**user["headers"], "If-Match": 'W/"0-0"'},
+    )
+    assert response.status_code == 412
+
+    response = await client.patch(
+        url,
+        json={"email": f"new{user['username']}@example.com"},
+        headers={**user["headers"], "If-Match": etag},
+    )
+    assert response.status_code == 200, response.text
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+from api.profiles.crud import ProfileCRUD
+from api.users.crud import UsersCRUD
+from models import Profile, User
+
+EXPORTS = ("/api/users/export", "/api/users/profiles/export")
+
+
+@pytest.mark.parametrize("url", EXPORTS)
+async def test_export_requires_token(client, url):
+    response = await client.get(url)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("url", EXPORTS)
+async def test_export_forbidden_for_regular_user(client, make_user, url):
+    user = await make_user()
+
+    response = await client.get(url, headers=user["headers"])
+
+    assert response.status_code == 403
+
+
+async def test_export_users_ndjson(client, make_admin):
+    admin = await make_admin()
+
+    response = await client.get("/api/users/export", headers=admin["headers"])
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {"id": admin["id"], "username": admin["username"]}.items() <= next(
+        row for row in rows if row["id"] == admin["id"]
+    ).items()
+
+
+async def test_export_profiles_csv(client, make_admin):
+    admin = await make_admin()
+
+    response = await client.get(
+        "/api/users/profiles/export",
+        params={"format": "csv"},
+        headers=admin["headers"],
+    )
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert str(admin["id"]) in {row["user_id"] for row in rows}
+
+
+@pytest.mark.parametrize(
+    "crud, key, column",
+    [(UsersCRUD, "id", User.id), (ProfileCRUD, "user_id", Profile.user_id)],
+)
+async def test_stream_yields_batches_of_yield_per_rows(
+    make_user, session, crud, key, column
+):
+    for _ in range(3):
+        await make_user()
+
+    batches = [rows async for rows in crud(session).stream(batch_size=2)]
+
+    assert len(batches) > 1
+    assert all(1 <= len(rows) <= 2 for rows in batches)
+    expected = (await session.scalars(select(column).order_by(column.table.c.id))).all()
+    assert [row[key] for rows in batches for row in rows] == expected
@@ -0,0 +1,150 @@
+import json
+
+from sqlalchemy import func, select
+
+from api.profiles.schemas import ProfileRead, default_profile
+from api.users.crud import UsersCRUD
+from api.users.importer import ImportReport, import_batch
+from api.users.schemas import User as UserSchema
+from models import Profile, User
+from tests.conftest import PASSWORD, unique_name
+
+
+def ndjson(*records) -> str:
+    return "\n".join(
+        record if isinstance(record, str) else json.dumps(record) for record in records
+    )
+
+
+def record(username: str, **fields) -> dict:
+    return {
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": PASSWORD,
+        "phone": "+79001112233",
+        **fields,
+    }
+
+
+async def test_import_requires_admin(client, make_user):
+    response = await client.post(
+        "/api/users/import", content=ndjson(record(unique_name()))
+    )
+    assert response.status_code == 401
+
+    user = await make_user()
+    response = await client.post(
+        "/api/users/import",
+        content=ndjson(record(unique_name())),
+        headers=user["headers"],
+    )
+    assert response.status_code == 403
+
+
+async def test_import_reports_bad_lines(client, make_admin, session):
+    admin = await make_admin()
+    first, second = unique_name(), unique_name()
+    body = ndjson(
+        record(first),
+        "{not json",
+        record(unique_name(), email=f"{'x' * 30}@example.com"),
+        record(second),
+        record(first),
+    )
+
+    response = await client.post(
+        "/api/users/import", content=body, headers=admin["headers"]
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["created"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3, 5]
+    assert "email" in report["errors"][1]["detail"]
+    count = await session.scalar(
+        select(func.count()).select_from(User).where(User.username.in_([first, second]))
+    )
+    assert count == 2
+
+
+async def test_import_csv(client, make_admin):
+    admin = await make_admin()
+    username = unique_name()
+    body = (
+        "username,email,password,first_name,phone\n"
+        f"{username},{username}@example.com,{PASSWORD},Ivan,+79001112233\n"
+    )
+
+    response = await client.post(
+        "/api/users/import",
+        params={"format": "csv"},
+        content=body,
+        headers=admin["headers"],
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"created": 1, "failed": 0, "errors": []}
+
+
+async def test_rejected_batch_is_reported_and_import_continues(app, session):
+    crud = UsersCRUD(session)
+    report = ImportReport()
+    rejected, accepted = unique_name(), unique_name()
+
+    def row(username: str, phone: str):
+        user_in = UserSchema(
+            username=username, email=f"{username}@example.com", password=PASSWORD
+        )
+        # Телефон длиннее колонки профиля проходит мимо схемы, но не мимо БД
+        return user_in, ProfileRead.model_construct(
+            first_name="", last_name="", phone=phone
+        )
+
+    await import_batch(crud, [(1, row(rejected, "+" * 40))], report)
+    await import_batch(crud, [(2, row(accepted, "+79001112233"))], report)
+
+    assert report.created == 1
+    assert report.failed == 1
+    assert report.errors[0]["line"] == 1
+    assert report.errors[0]["detail"].startswith("Batch rejected by database")
+    usernames = (
+        await session.scalars(
+            select(User.username).where(User.username.in_([rejected, accepted]))
+        )
+    ).all()
+    assert usernames == [accepted]
+
+
+async def test_import_stores_profile_like_signup(client, make_admin, session):
+    admin = await make_admin()
+    signed_up, imported, other = unique_name(), unique_name(), unique_name()
+    placeholder = default_profile.model_dump()
+    response = await client.post(
+        "/api/users",
+        json={
+            "user_in": {
+                "username": signed_up,
+                "email": f"{signed_up}@example.com",
+                "password": PASSWORD,
+            },
+            "profile_in": placeholder,
+        },
+    )
+    assert response.status_code == 200, response.text
+
+    # В одной пачке строки с разным набором заданных полей профиля
+    body = ndjson(record(imported, **placeholder), record(other, first_name="Ivan"))
+    response = await client.post(
+        "/api/users/import", content=body, headers=admin["headers"]
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == 2
+
+    rows = await session.execute(
+        select(User.username, Profile.first_name, Profile.last_name, Profile.phone)
+        .join(Profile, Profile.user_id == User.id)
+        .where(User.username.in_([signed_up, imported, other]))
+    )
+    profiles = {row.username: tuple(row)[1:] for row in rows}
+    assert profiles[imported] == profiles[signed_up] == ("", "", "")
+    assert profiles[other] == ("Ivan", "", "+79001112233")
@@ -0,0 +1,249 @@
+import json
+import uuid
+from datetime import datetime
+
+import asyncpg
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+
+from api.orders.crud import OrderCRUD
+from api.products.crud import ProductCRUD
+from api.products.schemas import ProductFilter
+from api.profiles.crud import ProfileCRUD
+from api.users.crud import UsersCRUD
+from config import settings
+from models.base import async_engine, async_session
+from tests.conftest import drop_database, migrate_database, recreate_database
+
+# Ревизия перед миграцией с индексами внешних ключей и сама миграция
+BEFORE_FK_INDEXES = "38c41dcb9833"
+FK_INDEXES = "308c835480c2"
+
+# Строк достаточно, чтобы seq scan проигрывал индексу по стоимости
+SEED_USERS = 20_000
+SEED_PRODUCTS = 2_000
+SEED_PREFIX = "idx"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def seeded(database):
+    """Пользователи с профилями и двумя заказами на одну позицию, товары"""
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            text("""
+                WITH created AS (
+                    INSERT INTO users (username, email)
+                    SELECT :prefix || i, :prefix || i || '@example.com'
+                    FROM generate_series(1, :users) AS i
+                    RETURNING id
+                )
+                INSERT INTO profiles (user_id, first_name, last_name, phone)
+                SELECT id, '', '', '' FROM created
+                """),
+            {"prefix": SEED_PREFIX, "users": SEED_USERS},
+        )
+        await connection.execute(
+            text("""
+                INSERT INTO products (name, description, price, quantity, image_url)
+                SELECT :prefix || ' product ' || i, '', 100, 10, ''
+                FROM generate_series(1, :products) AS i
+                """),
+            {"prefix": SEED_PREFIX, "products": SEED_PRODUCTS},
+        )
+        await connection.execute(
+            text("""
+                WITH created AS (
+                    INSERT INTO orders (name, owner_id)
+                    SELECT 'order', users.id
+                    FROM users, generate_series(1, 2)
+                    WHERE users.username LIKE :prefix || '%'
+                    RETURNING id
+                ),
+                products AS (
+                    SELECT min(id) AS id FROM products WHERE name LIKE :prefix || '%'
+                )
+                INSERT INTO order_items (order_id, item_id)
+                SELECT created.id, products.id FROM created, products
+                """),
+            {"prefix": SEED_PREFIX},
+        )
+        await connection.execute(
+            text("ANALYZE users, profiles, orders, order_items, products")
+        )
+        ids = await connection.execute(
+            text(
+                "SELECT min(id), max(id) FROM users WHERE username LIKE :prefix || '%'"
+            ),
+            {"prefix": SEED_PREFIX},
+        )
+        first, last = ids.one()
+    yield range(first, last + 1)
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            text("DELETE FROM users WHERE username LIKE :prefix || '%'"),
+            {"prefix": SEED_PREFIX},
+        )
+        await connection.execute(
+            text("DELETE FROM products WHERE name LIKE :prefix || '%'"),
+            {"prefix": SEED_PREFIX},
+        )
+
+
+def plan_nodes(plan: dict) -> list[dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", ()):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+async def crud_plans(call) -> list[list[dict]]:
+    """
+    Планы всех SELECT, которые выполнил вызов CRUD-метода, с теми же
+    параметрами. Настройки планировщика не меняются
+    """
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        if statement.lstrip().startswith("SELECT"):
+            executed.append((statement, parameters))
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        async with async_session() as session:
+            await call(session)
+    finally:
+        event.remove(
+            async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+    assert executed, "CRUD method did not query the database"
+    plans = []
+    async with async_engine.connect() as connection:
+        driver = (await connection.get_raw_connection()).driver_connection
+        for statement, parameters in executed:
+            plan = await driver.fetchval(
+                f"EXPLAIN (FORMAT JSON) {statement}", *parameters
+            )
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            plans.append(plan_nodes(plan[0]["Plan"]))
+    return plans
+
+
+def some_user(seeded) -> int:
+    """Пользователь, которого еще нет в кэшах"""
+    return seeded[uuid.uuid4().int % len(seeded)]
+
+
+CRUD_QUERIES = {
+    "UsersCRUD.get_by_id": (
+        lambda session, user_id: UsersCRUD(session).get_by_id(user_id),
+        [{"pk_users"}],
+    ),
+    "UsersCRUD.get_auth_by_name": (
+        lambda session, user_id: UsersCRUD(session).get_auth_by_name(
+            f"{SEED_PREFIX}{user_id % SEED_USERS + 1}"
+        ),
+        [{"uq_users_username"}],
+    ),
+    "UsersCRUD.get": (
+        lambda session, user_id: UsersCRUD(session).get(user_id, 20),
+        [{"pk_users"}],
+    ),
+    "ProfileCRUD.get_by_user_id": (
+        lambda session, user_id: ProfileCRUD(session).get_by_user_id(user_id),
+        [{"ix_profiles_user_id"}],
+    ),
+    "ProfileCRUD.get": (
+        lambda session, user_id: ProfileCRUD(session).get(user_id, 20),
+        [{"pk_profiles"}],
+    ),
+    "OrderCRUD.get_by_owner": (
+        lambda session, user_id: OrderCRUD(session).get_by_owner(user_id, None, 20),
+        # Заказы по владельцу, затем позиции страницы с товарами
+        [{"ix_orders_owner_id"}, {"ix_order_items_order_id", "pk_products"}],
+    ),
+    "ProductCRUD.get": (
+        lambda session, user_id: ProductCRUD(session).get(
+            user_id % SEED_PRODUCTS, 20, ProductFilter()
+        ),
+        [{"pk_products"}],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", CRUD_QUERIES)
+async def test_crud_query_uses_index(seeded, name):
+    call, expected = CRUD_QUERIES[name]
+    user_id = some_user(seeded)
+
+    plans = await crud_plans(lambda session: call(session, user_id))
+
+    assert len(plans) == len(expected)
+    for nodes, indexes in zip(plans, expected):
+        assert indexes <= {node.get("Index Name") for node in nodes}, nodes
+        assert not [node for node in nodes if node["Node Type"] == "Seq Scan"], nodes
+
+
+@pytest.fixture
+async def migrations_database(database):
+    name = f"{settings.db.name}_migrations"
+    await recreate_database(name)
+    await migrate_database(BEFORE_FK_INDEXES, name)
+    connection = await asyncpg.connect(
+        host=settings.db.direct_host or settings.db.host,
+        port=settings.db.direct_port or settings.db.port,
+        user=settings.db.user,
+        password=settings.db.password,
+        database=name,
+    )
+    yield name, connection
+    await connection.close()
+    await drop_database(name)
+
+
+async def test_duplicate_profiles_abort_migration(migrations_database):
+    name, connection = migrations_database
+    user_id = await connection.fetchval(
+        "INSERT INTO users (username, email) VALUES ('dup', 'dup@example.com') "
+        "RETURNING id"
+    )
+    for first_name, updated_at in (
+        ("old", datetime(2026, 1, 1)),
+        ("new", datetime(2026, 2, 1)),
+    ):
+        await connection.execute(
+            "INSERT INTO profiles (user_id, first_name, last_name, phone, updated_at) "
+            "VALUES ($1, $2, '', '', $3)",
+            user_id,
+            first_name,
+            updated_at,
+        )
+    # Остаток прошлой неудачной попытки: INVALID индекс с тем же именем
+    with pytest.raises(asyncpg.UniqueViolationError):
+        await connection.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY ix_profiles_user_id ON profiles (user_id)"
+        )
+
+    with pytest.raises(pytest.fail.Exception, match="1 users have more than one"):
+        await migrate_database(FK_INDEXES, name)
+
+    # Миграция ничего не удалила: выбор профиля остается за оператором
+    profiles = await connection.fetch(
+        "SELECT first_name FROM profiles WHERE user_id = $1 ORDER BY first_name",
+        user_id,
+    )
+    assert [profile["first_name"] for profile in profiles] == ["new", "old"]
+
+    await connection.execute(
+        "DELETE FROM profiles WHERE user_id = $1 AND first_name = 'old'", user_id
+    )
+    await migrate_database(FK_INDEXES, name)
+
+    valid = await connection.fetchval(
+        "SELECT indisvalid AND indisunique FROM pg_index "
+        "WHERE indexrelid = 'ix_profiles_user_id'::regclass"
+    )
+    assert valid
@@ -0,0 +1,94 @@
+import uuid
+
+import pytest_asyncio
+from sqlalchemy import text
+
+from core.cache import LRUCache
+from core.invalidation import CacheInvalidator
+from tests.conftest import wait_for
+
+
+@pytest_asyncio.fixture
+async def channel(database):
+    """Отдельный канал: уведомления приложения не мешают проверкам"""
+    return "test_" + uuid.uuid4().hex[:12]
+
+
+@pytest_asyncio.fixture
+async def workers(channel):
+    """Два инвалидатора на одном канале, как в двух воркерах приложения"""
+    invalidators = []
+    for _ in range(2):
+        invalidator = CacheInvalidator(channel, reconnect_interval=0.05)
+        invalidator.register("items", LRUCache(100))
+        invalidator.start()
+        invalidators.append(invalidator)
+    await wait_for(lambda: all(worker.connected for worker in invalidators))
+    yield invalidators
+    for invalidator in invalidators:
+        await invalidator.stop()
+
+
+def cache_of(invalidator: CacheInvalidator) -> LRUCache:
+    return invalidator.caches["items"][0]
+
+
+async def test_fill_skipped_after_concurrent_eviction(workers):
+    worker, _ = workers
+    cache = cache_of(worker)
+
+    generation = worker.generation
+    # Пока значение читалось из БД, запись сбросили
+    worker.evict("items", 1)
+    worker.fill(cache, 1, "stale", generation)
+    assert cache.get(1) is None
+
+    worker.fill(cache, 1, "fresh", worker.generation)
+    assert cache.get(1) == "fresh"
+
+
+async def test_fill_skipped_while_disconnected(channel):
+    invalidator = CacheInvalidator(channel)
+    cache = invalidator.register("items", LRUCache(100))
+
+    invalidator.fill(cache, 1, "value", invalidator.generation)
+
+    assert not invalidator.connected
+    assert cache.get(1) is None
+
+
+async def test_notify_evicts_in_other_workers_after_commit(workers, session):
+    writer, reader = workers
+    for worker in workers:
+        worker.fill(cache_of(worker), 1, "cached", worker.generation)
+        worker.fill(cache_of(worker), 2, "cached", worker.generation)
+
+    await writer.notify(session, "items", 1)
+    await session.rollback()
+    await writer.notify(session, "items", 2)
+    await session.commit()
+
+    await wait_for(lambda: cache_of(reader).get(2) is None)
+    # Уведомления доставляются по порядку: отмененное уже не придет
+    assert cache_of(reader).get(1) == "cached"
+    assert reader.stats["received"] == 1
+
+
+async def test_lost_listener_connection_clears_caches(workers, session, channel):
+    worker, _ = workers
+    worker.fill(cache_of(worker), 1, "cached", worker.generation)
+
+    await session.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE query = :query"
+        ),
+        {"query": f'LISTEN "{channel}"'},
+    )
+    await session.commit()
+
+    # Пропущенные за время переподключения уведомления не восстановить
+    await wait_for(lambda: cache_of(worker).get(1) is None)
+    await wait_for(lambda: worker.connected)
+    worker.fill(cache_of(worker), 1, "cached", worker.generation)
+    assert cache_of(worker).get(1) == "cached"
@@ -0,0 +1,21 @@
+async def test_metrics_requires_token(client):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 401
+
+
+async def test_metrics_forbidden_for_regular_user(client, make_user):
+    user = await make_user()
+
+    response = await client.get("/metrics", headers=user["headers"])
+
+    assert response.status_code == 403
+
+
+async def test_metrics_for_admin(client, make_admin):
+    admin = await make_admin()
+
+    response = await client.get("/metrics", headers=admin["headers"])
+
+    assert response.status_code == 200
+    assert "db_pools" in response.json()
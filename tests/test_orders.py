@@ -0,0 +1,228 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy import func, select, text, update
+
+from api.orders.crud import OrderCRUD
+from api.products.crud import catalog_cache, product_cache
+from models import OrderItem, Product
+from models.base import async_engine
+from tests.conftest import unique_word
+
+
+async def place(client, user: dict, *items: tuple[int, int]):
+    return await client.post(
+        "/api/orders",
+        json={
+            "items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in items
+            ]
+        },
+        headers=user["headers"],
+    )
+
+
+async def stock(session, product_id: int) -> int:
+    await session.rollback()
+    return await session.scalar(
+        select(Product.quantity).where(Product.id == product_id)
+    )
+
+
+async def wait_for_lock_wait(session) -> None:
+    """Ждет, пока какой-нибудь запрос к базе встанет в очередь на блокировку"""
+    statement = text(
+        "SELECT count(*) FROM pg_stat_activity"
+        " WHERE datname = current_database() AND wait_event_type = 'Lock'"
+    )
+    for _ in range(500):
+        await session.rollback()
+        if await session.scalar(statement):
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError("No query is waiting for a lock")
+
+
+async def test_concurrent_orders_never_oversell(
+    client, make_user, make_product, session
+):
+    user = await make_user()
+    product_id = await make_product(quantity=100)
+
+    responses = await asyncio.gather(
+        *(place(client, user, (product_id, 1)) for _ in range(500))
+    )
+
+    assert Counter(response.status_code for response in responses) == {
+        201: 100,
+        409: 400,
+    }
+    assert await stock(session, product_id) == 0
+    sold = await session.scalar(
+        select(func.sum(OrderItem.quantity)).where(OrderItem.item_id == product_id)
+    )
+    assert sold == 100
+
+
+async def test_crossed_multi_item_orders_complete(
+    client, make_user, make_product, session
+):
+    user = await make_user()
+    first = await make_product(quantity=1000)
+    second = await make_product(quantity=1000)
+
+    responses = await asyncio.gather(
+        *(
+            place(client, user, *(((first, 1), (second, 1))[:: 1 if i % 2 else -1]))
+            for i in range(100)
+        )
+    )
+
+    assert {response.status_code for response in responses} == {201}
+    assert await stock(session, first) == 900
+    assert await stock(session, second) == 900
+
+
+async def test_deadlock_victim_is_retried(
+    client, make_user, make_product, session, monkeypatch
+):
+    user = await make_user()
+    first = await make_product(quantity=10)
+    second = await make_product(quantity=10)
+    attempts = []
+    create = OrderCRUD._create
+
+    async def counted_create(self, owner_id, order_in):
+        attempts.append(owner_id)
+        return await create(self, owner_id, order_in)
+
+    monkeypatch.setattr(OrderCRUD, "_create", counted_create)
+
+    async with async_engine.connect() as other:
+        # Встречная транзакция держит второй товар, заказ блокирует первый
+        # и ждет второй. Проверку взаимоблокировки у встречной откладываем,
+        # чтобы жертвой Postgres выбрал именно заказ
+        await other.execute(text("SET LOCAL deadlock_timeout = '30s'"))
+        await other.execute(
+            update(Product).where(Product.id == second).values(quantity=10)
+        )
+        order = asyncio.create_task(place(client, user, (first, 1), (second, 1)))
+        await wait_for_lock_wait(session)
+        await other.execute(
+            update(Product).where(Product.id == first).values(quantity=10)
+        )
+        await other.commit()
+        response = await order
+
+    assert response.status_code == 201, response.text
+    assert len(attempts) == 2
+    assert await stock(session, first) == 9
+    assert await stock(session, second) == 9
+
+
+async def test_order_evicts_only_pages_with_product(client, make_user, make_product):
+    user = await make_user()
+    ordered_word, other_word = unique_word(), unique_word()
+    ordered = await make_product(name=f"Ordered {ordered_word}", quantity=5)
+    await make_product(name=f"Other {other_word}", quantity=5)
+    for word in (ordered_word, other_word):
+        response = await client.get("/api/products/search", params={"q": word})
+        assert response.status_code == 200
+    assert (await client.get(f"/api/products/{ordered}")).status_code == 200
+
+    response = await place(client, user, (ordered, 1))
+    assert response.status_code == 201, response.text
+
+    # Страница без заказанного товара отдается из кэша, с ним - читается заново
+    for word, hits in ((other_word, 1), (ordered_word, 0)):
+        before = catalog_cache.stats["hits"]
+        response = await client.get("/api/products/search", params={"q": word})
+        assert response.status_code == 200
+        assert catalog_cache.stats["hits"] - before == hits
+    assert product_cache.get(ordered) is None
+    response = await client.get(f"/api/products/{ordered}")
+    assert response.json()["quantity"] == 4
+
+
+async def test_sold_out_product_clears_catalog(client, make_user, make_product):
+    user = await make_user()
+    product_id = await make_product(quantity=1)
+    response = await client.get("/api/products", params={"in_stock": True})
+    assert response.status_code == 200
+    assert len(catalog_cache) > 0
+
+    response = await place(client, user, (product_id, 1))
+    assert response.status_code == 201, response.text
+
+    assert len(catalog_cache) == 0
+
+
+async def test_new_order_is_in_history_right_away(
+    client, make_user, make_product, broken_replica
+):
+    user = await make_user()
+    product_id = await make_product()
+
+    response = await place(client, user, (product_id, 2))
+    assert response.status_code == 201, response.text
+
+    # Без read-your-writes история читалась бы с отстающей реплики
+    response = await client.get("/api/users/me/orders", headers=user["headers"])
+    assert response.status_code == 200, response.text
+    assert [order["items"][0]["quantity"] for order in response.json()["items"]] == [2]
+
+
+async def test_order_history_query_count_does_not_grow(
+    client, make_user, make_product, queries
+):
+    product_id = await make_product(quantity=100)
+    counts = []
+    for orders in (1, 5):
+        user = await make_user()
+        for _ in range(orders):
+            response = await place(client, user, (product_id, 1))
+            assert response.status_code == 201, response.text
+        queries.clear()
+        response = await client.get("/api/users/me/orders", headers=user["headers"])
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == orders
+        assert all(
+            order["items"][0]["product"]["id"] == product_id
+            for order in response.json()["items"]
+        )
+        counts.append(len(queries))
+
+    # Заказы и позиции с товарами: два запроса при любом числе заказов
+    assert counts == [2, 2]
+
+
+async def test_orm_delete_of_user_cascades_in_database(make_user, make_product, client):
+    from sqlalchemy.orm import selectinload
+
+    from models import Order, Profile, User
+    from models.base import async_session
+
+    user = await make_user()
+    response = await place(client, user, (await make_product(), 1))
+    assert response.status_code == 201, response.text
+
+    async with async_session() as session:
+        # Так удаляет админка: со связями, которые она показывает
+        instance = await session.scalar(
+            select(User)
+            .where(User.id == user["id"])
+            .options(
+                selectinload(User.profile),
+                selectinload(User.address),
+                selectinload(User.order),
+            )
+        )
+        await session.delete(instance)
+        await session.commit()
+
+        for model, column in ((Profile, Profile.user_id), (Order, Order.owner_id)):
+            count = await session.scalar(
+                select(func.count()).select_from(model).where(column == user["id"])
+            )
+            assert count == 0
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+
+from api.pagination import decode_cursor, encode_cursor, next_cursor, page_params
+from config import settings
+
+
+async def test_pages_cover_all_users_once(client, make_user):
+    created = {(await make_user())["username"] for _ in range(5)}
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = await client.get("/api/users/all_users", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(user["username"] for user in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+
+
+async def test_invalid_cursor_is_rejected(client):
+    for cursor in ("not-a-cursor", next_cursor(1)[:-2], "eyJpZCI6ImEifQ=="):
+        response = await client.get("/api/users/all_users", params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+
+
+async def test_cursor_id_outside_integer_range_is_rejected(client):
+    for value in (True, 0, -1, 2**31, 2**70, 1.5):
+        cursor = encode_cursor({"id": value})
+        response = await client.get("/api/users/all_users", params={"cursor": cursor})
+        assert response.status_code == 400, value
+
+
+async def test_zero_limit_is_rejected(client):
+    response = await client.get("/api/users/all_users", params={"limit": 0})
+
+    assert response.status_code == 422
+
+
+def test_cursor_round_trip_and_limit_cap():
+    params = page_params(cursor=next_cursor(42), limit=settings.api.max_page_size + 1)
+
+    assert params.after_id == 42
+    assert params.limit == settings.api.max_page_size
+    assert decode_cursor(next_cursor(7)) == {"id": 7}
+
+
+def test_cursor_must_hold_an_object():
+    with pytest.raises(HTTPException):
+        decode_cursor("WzFd")  # [1]
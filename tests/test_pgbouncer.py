@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+from config import settings
+from models.base import create_engine
+
+# Имена, которые asyncpg по умолчанию дает подготовленным запросам. За PgBouncer
+# такие запросы другого клиента могут остаться на том же серверном соединении
+FOREIGN_STATEMENTS = [f"__asyncpg_stmt_{i}__" for i in range(1, 11)]
+
+
+async def run_queries(pgbouncer: bool, monkeypatch, foreign: list[str]) -> list[str]:
+    """
+    Один и тот же запрос в разных транзакциях на одном соединении.
+    Возвращает имена подготовленных запросов, оставшихся на сервере
+    """
+    monkeypatch.setattr(settings.db, "pgbouncer", pgbouncer)
+    engine = create_engine(settings.db.async_url)
+    try:
+        async with engine.connect() as connection:
+            raw = await connection.get_raw_connection()
+            for name in foreign:
+                await raw.driver_connection.execute(f"PREPARE {name} AS SELECT 1")
+            for i in range(3):
+                result = await connection.execute(
+                    text("SELECT CAST(:value AS integer)"), {"value": i}
+                )
+                assert result.scalar() == i
+                await connection.commit()
+            # Список читается в обход SQLAlchemy, чтобы не подготовить еще один запрос
+            rows = await raw.driver_connection.fetch(
+                "SELECT name FROM pg_prepared_statements"
+            )
+            return [row["name"] for row in rows]
+    finally:
+        await engine.dispose()
+
+
+async def test_pgbouncer_mode_survives_foreign_prepared_statements(
+    database, monkeypatch
+):
+    prepared = await run_queries(True, monkeypatch, FOREIGN_STATEMENTS)
+
+    # Свои запросы не сталкиваются с чужими именами и не остаются на сервере
+    assert sorted(prepared) == sorted(FOREIGN_STATEMENTS)
+
+
+async def test_direct_mode_keeps_prepared_statements(database, monkeypatch):
+    prepared = await run_queries(False, monkeypatch, [])
+
+    # Без PgBouncer подготовленные запросы кэшируются на соединении
+    assert prepared
+
+
+def test_direct_url_defaults_to_host(monkeypatch):
+    monkeypatch.setattr(settings.db, "direct_host", None)
+    monkeypatch.setattr(settings.db, "direct_port", None)
+    assert settings.db.direct_url == settings.db.async_url
+
+    monkeypatch.setattr(settings.db, "direct_host", "postgres-direct")
+    monkeypatch.setattr(settings.db, "direct_port", 6543)
+    assert "@postgres-direct:6543/" in settings.db.direct_url
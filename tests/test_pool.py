@@ -0,0 +1,111 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import exc, text
+
+from api.pagination import encode_cursor
+from config import settings
+from models.base import async_engine, create_engine
+
+
+@pytest_asyncio.fixture
+async def small_engine(database, monkeypatch):
+    """Движок с пулом на одно соединение и коротким ожиданием"""
+    monkeypatch.setattr(settings.db, "pool_sizing", "fixed")
+    monkeypatch.setattr(settings.db, "pool_size", 1)
+    monkeypatch.setattr(settings.db, "pool_timeout", 0.05)
+    engine = create_engine(settings.db.async_url)
+    yield engine
+    await engine.dispose()
+
+
+async def test_pool_metrics_count_checkouts_and_timeouts(small_engine):
+    pool = small_engine.pool
+
+    async with small_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            async with small_engine.connect():
+                pass
+        stats = pool.metrics.stats(pool)
+
+    assert stats["size"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait"]["max"] >= settings.db.pool_timeout
+    # Корзины накопительные, как в гистограммах Prometheus
+    counts = list(stats["wait"]["buckets"].values())
+    assert counts == sorted(counts)
+    assert counts[-1] == 2
+    assert stats["connections"] == 1
+    assert stats["connection_age"]["max"] > 0
+
+
+async def test_closed_connections_leave_metrics(small_engine):
+    async with small_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    pool = small_engine.pool
+    assert pool.metrics.stats(pool)["connections"] == 1
+
+    await small_engine.dispose()
+
+    pool = small_engine.pool
+    assert pool.metrics.stats(pool)["connections"] == 0
+    assert pool.metrics.stats(pool)["checkouts"] == 1
+
+
+@pytest.mark.parametrize(
+    "budget, workers, pool_size",
+    [(20, 1, 19), (20, 4, 4), (20, 10, 1), (20, 40, 1)],
+)
+def test_budget_pool_leaves_a_connection_for_listen(budget, workers, pool_size):
+    config = settings.db.model_copy(
+        update={
+            "pool_sizing": "budget",
+            "connection_budget": budget,
+            "workers": workers,
+        }
+    )
+
+    assert config.effective_pool_size == pool_size
+    # Пулы всех воркеров и их соединения LISTEN укладываются в бюджет,
+    # пока на каждого воркера приходится хотя бы два соединения
+    if budget // workers >= 2:
+        assert (config.effective_pool_size + 1) * workers <= budget
+
+
+def test_fixed_pool_ignores_budget():
+    config = settings.db.model_copy(
+        update={"pool_sizing": "fixed", "pool_size": 7, "connection_budget": 2}
+    )
+
+    assert config.effective_pool_size == 7
+
+
+async def test_rejected_requests_do_not_check_out_connections(client, make_user):
+    user = await make_user()
+    # /me кладет пользователя в кэш: следующий такой запрос в БД не ходит
+    response = await client.get("/api/users/me", headers=user["headers"])
+    assert response.status_code == 200
+    bad_cursor = encode_cursor({"id": "x"})
+    requests = [
+        ("/api/users/me", {}, {}, 401),
+        ("/api/users/me", {"Authorization": "Bearer bad"}, {}, 401),
+        ("/api/users/all_users", {}, {"cursor": bad_cursor}, 400),
+        ("/api/users/me/orders", user["headers"], {"cursor": bad_cursor}, 400),
+        ("/api/products/search", {}, {"q": "phone", "cursor": bad_cursor}, 400),
+        ("/api/users/me", user["headers"], {}, 200),
+    ]
+    metrics = async_engine.pool.metrics
+
+    for url, headers, params, code in requests:
+        checkouts = metrics.checkouts
+        response = await client.get(url, headers=headers, params=params)
+        assert response.status_code == code, url
+        assert metrics.checkouts == checkouts, url
+
+    # Принятый запрос к БД счетчик увеличивает
+    checkouts = metrics.checkouts
+    response = await client.get("/api/users/all_users")
+    assert response.status_code == 200
+    assert metrics.checkouts > checkouts
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.exc import ProgrammingError
+
+from api.get_session import read_session
+from api.products.crud import CATALOG_KEY, product_cache
+from core.invalidation import cache_invalidator
+from core.replicas import ReplicaRouter, replica_router
+from models import Product
+from models.base import async_session, create_engine
+from config import settings
+from tests.conftest import wait_for
+
+
+async def test_reads_go_to_replica_by_default(broken_replica):
+    async with read_session() as session:
+        with pytest.raises(ProgrammingError):
+            await session.execute(select(Product.id).limit(1))
+
+
+async def test_cache_refill_after_notify_reads_primary(
+    client, make_product, broken_replica
+):
+    product_id = await make_product(quantity=5)
+    assert (await client.get(f"/api/products/{product_id}")).status_code == 200
+    # Изменение без ORM с уведомлением в той же транзакции, как в CRUD
+    async with async_session() as session:
+        await session.execute(
+            update(Product).where(Product.id == product_id).values(quantity=3)
+        )
+        await cache_invalidator.notify(session, "products", product_id)
+        await session.commit()
+    await wait_for(lambda: product_cache.get(product_id) is None)
+
+    assert replica_router.written_recently(("products", product_id))
+    assert replica_router.written_recently(CATALOG_KEY)
+    response = await client.get(f"/api/products/{product_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity"] == 3
+    response = await client.get("/api/products", params={"limit": 1})
+    assert response.status_code == 200, response.text
+
+
+async def test_unavailable_replica_falls_back_to_primary(database):
+    # Порт, на котором никто не слушает
+    engine = create_engine(
+        f"postgresql+asyncpg://nobody:x@127.0.0.1:1/{settings.db.name}"
+    )
+    router = ReplicaRouter([engine], max_lag=5, check_interval=1, read_your_writes=10)
+    try:
+        await router.check()
+    finally:
+        await engine.dispose()
+
+    assert router.stats == {"replicas": 1, "healthy": 0, "lag": [None]}
+    assert router.engine_for_read() is None
+
+
+async def test_recent_writer_reads_primary(broken_replica):
+    router = ReplicaRouter(
+        [broken_replica], max_lag=5, check_interval=1, read_your_writes=10
+    )
+    await router.check()
+
+    assert router.engine_for_read(1) is broken_replica
+    router.mark_write(1)
+    assert router.engine_for_read(1) is None
+    assert router.engine_for_read(2) is broken_replica
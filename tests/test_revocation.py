@@ -0,0 +1,60 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+
+from core.invalidation import cache_invalidator
+from core.revocation import (
+    PostgresRevocationBackend,
+    TokenRevocationStore,
+    revocation_store,
+)
+from models import RevokedToken
+
+
+async def wait_revoked(store: TokenRevocationStore, jti: str, timeout: float) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if await store.is_revoked(jti):
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def test_revocation_in_other_worker_is_seen_before_sync(app):
+    # Второй экземпляр с тем же хранилищем изображает другой воркер
+    other_worker = TokenRevocationStore(PostgresRevocationBackend(), sync_interval=3600)
+    jti = uuid.uuid4().hex
+    exp = int((datetime.now(timezone.utc) + timedelta(minutes=5)).timestamp())
+    assert not await revocation_store.is_revoked(jti)
+
+    await other_worker.revoke(jti, exp)
+
+    assert await wait_revoked(revocation_store, jti, timeout=2)
+
+
+async def test_bloom_miss_checks_backend_without_listener(app, session, monkeypatch):
+    jti = uuid.uuid4().hex
+    # Запись без NOTIFY: так выглядит отзыв, уведомление о котором потерялось
+    await session.execute(
+        insert(RevokedToken).values(
+            jti=jti,
+            expires_at=PostgresRevocationBackend._utc(time.time() + 300),
+        )
+    )
+    await session.commit()
+    monkeypatch.setattr(cache_invalidator, "connected", False)
+
+    assert await revocation_store.is_revoked(jti)
+
+
+async def test_revoked_token_is_rejected(client, make_user):
+    user = await make_user()
+    response = await client.post("/logout", json=user["tokens"])
+    assert response.status_code == 200, response.text
+
+    response = await client.get("/api/users/me", headers=user["headers"])
+
+    assert response.status_code == 401
@@ -0,0 +1,89 @@
+import base64
+
+import pytest
+
+from api.pagination import encode_cursor
+from tests.conftest import unique_word
+
+
+async def search(client, query: str, **params) -> dict:
+    response = await client.get("/api/products/search", params={"q": query, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_name_match_ranks_above_description_match(client, make_product):
+    word = unique_word()
+    in_description = await make_product(
+        name="Plain lamp", description=f"Goes well with {word}"
+    )
+    in_name = await make_product(name=f"Lamp {word}", description="Desk lamp")
+
+    page = await search(client, word)
+
+    assert [product["id"] for product in page["items"]] == [in_name, in_description]
+
+
+async def test_typo_in_name_is_found(client, make_product):
+    word = "thermostat" + unique_word()
+    product_id = await make_product(name=f"Smart {word}")
+    typo = word[:4] + word[5:]
+
+    page = await search(client, typo)
+
+    assert product_id in [product["id"] for product in page["items"]]
+
+
+async def test_word_prefix_is_found(client, make_product):
+    word = "kettle" + unique_word()
+    product_id = await make_product(name=f"Electric {word}")
+
+    page = await search(client, word[:-2])
+
+    assert product_id in [product["id"] for product in page["items"]]
+
+
+async def test_russian_word_forms_match(client, make_product):
+    product_id = await make_product(
+        name=f"Чайник {unique_word()}", description="Электрические чайники"
+    )
+
+    page = await search(client, "электрический чайник", limit=100)
+
+    assert product_id in [product["id"] for product in page["items"]]
+
+
+async def test_search_pages_have_no_duplicates(client, make_product):
+    word = unique_word()
+    created = {await make_product(name=f"Item {word} {i}") for i in range(5)}
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        page = await search(client, word, **params)
+        seen.extend(product["id"] for product in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        encode_cursor({"rank": float("nan"), "id": 1}),
+        base64.urlsafe_b64encode(b'{"rank":Infinity,"id":1}').decode(),
+        encode_cursor({"rank": True, "id": 1}),
+        encode_cursor({"rank": "1", "id": 1}),
+        encode_cursor({"rank": 0.5, "id": True}),
+        encode_cursor({"rank": 0.5, "id": 2**70}),
+    ],
+)
+async def test_invalid_ranked_cursor_is_rejected(client, cursor):
+    response = await client.get(
+        "/api/products/search", params={"q": "phone", "cursor": cursor}
+    )
+
+    assert response.status_code == 400
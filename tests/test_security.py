@@ -0,0 +1,86 @@
+import asyncio
+import multiprocessing
+
+import pytest
+from fastapi import HTTPException
+
+from core.security import (
+    PasswordHashPool,
+    get_password_hash_async,
+    get_password_hashes_async,
+    verify_password,
+    verify_password_async,
+)
+
+
+async def test_hash_and_verify_in_process_pool(app):
+    password_hash = await get_password_hash_async("secret-password")
+
+    assert verify_password("secret-password", password_hash)
+    assert await verify_password_async("secret-password", password_hash)
+    assert not await verify_password_async("other-password", password_hash)
+
+    hashes = await get_password_hashes_async([f"password{i}" for i in range(4)])
+    assert [verify_password(f"password{i}", h) for i, h in enumerate(hashes)] == [
+        True
+    ] * 4
+
+
+async def test_hashing_does_not_block_event_loop():
+    pool = PasswordHashPool(workers=1, max_pending=4, wait_timeout=5)
+    pool.start()
+    try:
+        with multiprocessing.Manager() as manager:
+            release = manager.Event()
+            job = asyncio.create_task(pool.run(release.wait, 10))
+            # Задача ждет в процессе пула, а отпускает ее сам цикл событий:
+            # если бы пул блокировал цикл, wait вернул бы False по таймауту
+            await asyncio.sleep(0)
+            release.set()
+            assert await job is True
+    finally:
+        pool.shutdown()
+
+
+async def test_full_pool_rejects_with_503():
+    pool = PasswordHashPool(workers=1, max_pending=1, wait_timeout=0.05)
+    pool.start()
+    try:
+        with multiprocessing.Manager() as manager:
+            release = manager.Event()
+            busy = asyncio.create_task(pool.run(release.wait, 10))
+            await asyncio.sleep(0)
+            # Единственный слот занят до release.set(), ожидание истекает
+            with pytest.raises(HTTPException) as error:
+                await pool.run(str, 1)
+            assert error.value.status_code == 503
+            assert error.value.headers["Retry-After"] == "1"
+            release.set()
+            assert await busy is True
+    finally:
+        pool.shutdown()
+
+
+def block(started, release) -> bool:
+    started.set()
+    return release.wait(10)
+
+
+async def test_bulk_jobs_leave_processes_for_single_jobs():
+    pool = PasswordHashPool(workers=2, max_pending=16, wait_timeout=5, bulk_workers=1)
+    pool.start()
+    try:
+        with multiprocessing.Manager() as manager:
+            started, release = manager.Event(), manager.Event()
+            bulk = asyncio.gather(
+                *(pool.run_bulk(block, started, release) for _ in range(3))
+            )
+            loop = asyncio.get_running_loop()
+            assert await loop.run_in_executor(None, started.wait, 10)
+            # Массовые задачи держат один процесс, второй свободен для входа
+            assert await pool.run(str, 1) == "1"
+            assert not release.is_set()
+            release.set()
+            assert await bulk == [True] * 3
+    finally:
+        pool.shutdown()
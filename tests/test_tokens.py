@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+from sqlalchemy import func, insert, select
+
+from api.tokens.crud import utcnow
+from config import settings
+from models import RefreshToken
+
+
+def expired_access_token(user: dict) -> str:
+    claims = {
+        "sub": str(user["id"]),
+        "username": user["username"],
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.now(timezone.utc) - timedelta(minutes=1),
+    }
+    return jwt.encode(claims, settings.api.secret_key, algorithm="HS256")
+
+
+async def test_refresh_rotates_token(client, make_user):
+    user = await make_user()
+
+    response = await client.post(
+        "/token/refresh", json={"refresh_token": user["tokens"]["refresh_token"]}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["refresh_token"] != user["tokens"]["refresh_token"]
+
+
+async def test_concurrent_rotation_revokes_family(client, make_user):
+    user = await make_user()
+    body = {"refresh_token": user["tokens"]["refresh_token"]}
+
+    responses = await asyncio.gather(
+        client.post("/token/refresh", json=body),
+        client.post("/token/refresh", json=body),
+    )
+
+    # Второй обмен ждет блокировку строки и видит уже использованный токен:
+    # это считается повторным предъявлением, и семейство отзывается целиком
+    assert sorted(response.status_code for response in responses) == [200, 401]
+    (winner,) = [response for response in responses if response.status_code == 200]
+    response = await client.post(
+        "/token/refresh", json={"refresh_token": winner.json()["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+async def test_logout_with_expired_access_token_revokes_refresh(client, make_user):
+    user = await make_user()
+    refresh_token = user["tokens"]["refresh_token"]
+
+    response = await client.post(
+        "/logout",
+        json={
+            "access_token": expired_access_token(user),
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+        },
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.post(
+        "/token/refresh", json={"refresh_token": refresh_token}
+    )
+    assert response.status_code == 401
+
+
+async def test_logout_with_only_refresh_token(client, make_user):
+    user = await make_user()
+    refresh_token = user["tokens"]["refresh_token"]
+
+    response = await client.post("/logout", json={"refresh_token": refresh_token})
+    assert response.status_code == 200, response.text
+
+    response = await client.post(
+        "/token/refresh", json={"refresh_token": refresh_token}
+    )
+    assert response.status_code == 401
+
+
+async def test_logout_without_tokens_is_rejected(client):
+    response = await client.post("/logout", json={})
+
+    assert response.status_code == 401
+
+
+async def test_issue_purges_expired_refresh_tokens(client, make_user, session):
+    user = await make_user()
+    await session.execute(
+        insert(RefreshToken).values(
+            [
+                {
+                    "token_hash": uuid.uuid4().hex * 2,
+                    "family_id": uuid.uuid4().hex,
+                    "user_id": user["id"],
+                    "expires_at": utcnow() - timedelta(days=1),
+                }
+                for _ in range(3)
+            ]
+        )
+    )
+    await session.commit()
+
+    response = await client.post(
+        "/token/refresh", json={"refresh_token": user["tokens"]["refresh_token"]}
+    )
+    assert response.status_code == 200, response.text
+
+    expired = await session.scalar(
+        select(func.count())
+        .select_from(RefreshToken)
+        .where(RefreshToken.expires_at <= utcnow())
+    )
+    assert expired == 0
@@ -0,0 +1,170 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from api.profiles.schemas import ProfileRead
+import api.users.crud
+from api.users.crud import UsersCRUD
+from api.users.schemas import User as UserSchema
+from models import Profile, User
+from tests.conftest import PASSWORD, unique_name
+
+
+def new_user(username: str) -> UserSchema:
+    return UserSchema(
+        username=username, email=f"{username}@example.com", password=PASSWORD
+    )
+
+
+async def test_create_user_with_profile(client, session):
+    username = unique_name()
+    response = await client.post(
+        "/api/users",
+        json={
+            "user_in": new_user(username).model_dump(),
+            "profile_in": {"first_name": "Ivan", "phone": "+79001112233"},
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["profile"]["first_name"] == "Ivan"
+    statement = (
+        select(Profile.phone)
+        .join(User, Profile.user_id == User.id)
+        .where(User.username == username)
+    )
+    assert await session.scalar(statement) == "+79001112233"
+
+
+async def test_failed_profile_insert_rolls_back_user(session):
+    username = unique_name()
+    # Телефон длиннее колонки: INSERT профиля падает уже после INSERT пользователя
+    profile = ProfileRead.model_construct(first_name="", last_name="", phone="+" * 40)
+
+    with pytest.raises(DBAPIError):
+        await UsersCRUD(session).create(new_user(username), profile)
+    await session.rollback()
+
+    count = await session.scalar(
+        select(func.count()).select_from(User).where(User.username == username)
+    )
+    assert count == 0
+
+
+async def test_create_duplicate_user_conflicts(client):
+    body = {
+        "user_in": new_user(unique_name()).model_dump(),
+        "profile_in": {"phone": "+79001112233"},
+    }
+    assert (await client.post("/api/users", json=body)).status_code == 200
+
+    response = await client.post("/api/users", json=body)
+
+    assert response.status_code == 409
+
+
+async def test_signup_without_profile(client):
+    username = unique_name()
+
+    response = await client.post(
+        "/api/users", json={"user_in": new_user(username).model_dump()}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["profile"] == {
+        "first_name": "",
+        "last_name": "",
+        "phone": "",
+    }
+    response = await client.post(
+        "/login", data={"username": username, "password": PASSWORD}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get("/api/users/me/profile", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["user info"]["phone"] == ""
+    response = await client.get("/api/users/profiles", params={"limit": 100})
+    assert response.status_code == 200, response.text
+
+
+async def test_lists_read_plain_rows(make_user, session, queries):
+    from api.profiles.crud import ProfileCRUD
+
+    await make_user()
+    queries.clear()
+
+    users, _ = await UsersCRUD(session).get(None, 10)
+    profiles, _ = await ProfileCRUD(session).get(None, 10)
+
+    assert users and set(users[0]) == {"username", "email"}
+    assert profiles and set(profiles[0]) == {"first_name", "last_name", "phone"}
+    # Строки не превращаются в ORM-объекты и не попадают в identity map
+    assert len(session.identity_map) == 0
+    assert not any("password_hash" in statement for statement in queries)
+
+
+async def test_me_reads_plain_row(client, make_user):
+    user = await make_user()
+
+    response = await client.get("/api/users/me", headers=user["headers"])
+
+    assert response.status_code == 200, response.text
+    assert response.json()["user info"] == {
+        "username": user["username"],
+        "email": f"{user['username']}@example.com",
+    }
+
+
+@pytest.fixture
+def hashed_passwords(monkeypatch):
+    """Пароли, переданные на хэширование при изменении пользователя"""
+    passwords = []
+    get_password_hash_async = api.users.crud.get_password_hash_async
+
+    async def counting_hash(password: str) -> str:
+        passwords.append(password)
+        return await get_password_hash_async(password)
+
+    monkeypatch.setattr(api.users.crud, "get_password_hash_async", counting_hash)
+    return passwords
+
+
+async def test_unchanged_patch_writes_nothing(
+    client, make_user, queries, hashed_passwords
+):
+    user = await make_user()
+    queries.clear()
+    hashed_passwords.clear()
+
+    response = await client.patch(
+        "/api/users/me",
+        json={"email": f"{user['username']}@example.com", "password": PASSWORD},
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200, response.text
+    assert not any(statement.startswith("UPDATE") for statement in queries)
+    assert not any("pg_notify" in statement for statement in queries)
+    assert hashed_passwords == []
+
+
+async def test_changed_password_is_hashed_once(
+    client, make_user, queries, hashed_passwords
+):
+    user = await make_user()
+    queries.clear()
+    hashed_passwords.clear()
+
+    response = await client.patch(
+        "/api/users/me",
+        json={"password": "password2"},
+        headers=user["headers"],
+    )
+
+    assert response.status_code == 200, response.text
+    assert hashed_passwords == ["password2"]
+    assert any(statement.startswith("UPDATE users") for statement in queries)
+    response = await client.post(
+        "/login", data={"username": user["username"], "password": "password2"}
+    )
+    assert response.status_code == 200